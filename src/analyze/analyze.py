@@ -1,111 +1,277 @@
 import os
+import json
 import math
-import random
-import warnings
-import seaborn as sns
-import pandas as pd
-import matplotlib.pyplot as plt
+import threading
+import concurrent.futures
 import numpy as np
-import openpyxl
-from llm import complete
+from analyze.critique import CRITIQUE_WORKERS, critique_assessments
 from analyze.elo import calculate_winning_likelihoods, estimate_elo
+from analyze.bradley_terry import estimate_bradley_terry
+from analyze.bootstrap import bootstrap_ratings
+from analyze.export import export_grades
+from analyze.grades import generate_grade_analysis
+from analyze.plot import (
+    get_matches_fingerprint,
+    get_score_history_charts,
+    get_score_matrix_charts,
+    render_charts,
+)
 from src.competition.loader import load_tournaments
+from src.storage.content import content_hash
+from src.storage.files import read_json, write_file
+from src.competition.leaderboard import (
+    get_sorted_leaderboard,
+    get_leaderboard_stats,
+)
 
-warnings.simplefilter(action="ignore", category=FutureWarning)
+# Guards loading and persisting the critiques of a tournament
+_critiques_lock = threading.Lock()
+
+# The file in each output directory recording the inputs of the analyzed tournaments
+ANALYSIS_MANIFEST = "analysis.manifest.json"
+
+
+##############################################
+def _get_player_matches(tournament, player_name):
+    """Get the names and records of a player's decided matches, from their index only"""
+
+    return [
+        (match_name, match)
+        for match_name, match in tournament["matches"].items()
+        if match["result"]["winner"] not in ("DRAW", "DNP")
+        and player_name in (match["player_A"]["name"], match["player_B"]["name"])
+    ]
 
-CRITIQUE_MODEL = "gpt-4-1106-preview"
 
 ##############################################
-CRITIQUE_PROMPT = """The player {player} is participating in a tournament with the aim to {objective}. The player has received the following assessments of their performance against opponents in their matches:
+def _get_matches_hash(tournament, matches):
+    """Hash the identity of matches by name, fingerprint and time stored, so that
+    a replayed match changes the hash without loading any match body"""
+
+    return content_hash(
+        sorted(
+            [
+                match_name,
+                match.get("fingerprint", ""),
+                tournament["match_times"].get(match_name, 0.0),
+            ]
+            for match_name, match in matches
+        )
+    )
+
+
+##############################################
+def _collect_assessments(player_name, matches):
+    """Collect the assessments of a player's matches, from their perspective"""
+
+    assessments = []
+
+    for _match_name, match in matches:
+        assessment = match["result"]["assessment"]
+        if match["player_A"]["name"] == player_name:
+            assessment = assessment.replace("Player A", player_name)
+            assessment = assessment.replace("Player B", "the opponent")
+        else:
+            assessment = assessment.replace("Player A", "the opponent")
+            assessment = assessment.replace("Player B", player_name)
 
-{assessments}
+        assessments.append(assessment)
 
-Silently analyze the performance of the player {player} across all these assessments. 
+    return assessments
 
-Then, firstly, give a detailed and highly specific assessment of the strengths of the player in a bullet list. 
 
-Then, secondly, giuve a detailed and highly specific assessment of the weaknesses of the player in a bullet list.
+##############################################
+def _get_critiques_filename(tournament):
+    """Get the file the critiques of a tournament are persisted in"""
 
-Provide your response in like this:
+    competition = tournament["meta"]["competition"]["name"]
+    tournament_name = tournament["meta"]["tournament"]
+    return f"competitions/{competition}/tournaments/{tournament_name}/critiques.json"
 
-STRENGTHS:
-- ...
-- ...
-- ...
 
-WEAKNESSES:
-- ...
-- ...
-- ...
+##############################################
+def _load_critiques(tournament):
+    """Load the persisted critiques of a tournament into its state, once"""
+
+    with _critiques_lock:
+        if "critiques" not in tournament:
+            critiques_filename = _get_critiques_filename(tournament)
+            tournament["critiques"] = (
+                read_json(critiques_filename)
+                if os.path.exists(critiques_filename)
+                else {}
+            )
 
-Now, it is time to provide your response."""
+    return tournament["critiques"]
+
+
+##############################################
+def _store_critique(tournament, player_name, matches_hash, critique):
+    """Persist the critique of a player along with the hash of the matches it is based on"""
+
+    with _critiques_lock:
+        tournament["critiques"][player_name] = {
+            "matches": matches_hash,
+            "critique": critique,
+        }
+        critiques_filename = _get_critiques_filename(tournament)
+        write_file(critiques_filename, json.dumps(tournament["critiques"], indent=2))
 
 
 ##############################################
 def get_player_critique(tournament, player_name, do_critique):
-    """Evaluate the strengths and weaknesses of a player"""
+    """Evaluate the strengths and weaknesses of a player, re-using the persisted
+    critique as long as the player's matches are unchanged"""
 
     if not do_critique:
         return "n/a"
 
-    if "critiques" in tournament and player_name in tournament["critiques"]:
-        return tournament["critiques"][player_name]
+    critiques = _load_critiques(tournament)
 
-    # collect assessments
-    assessments = []
+    # check the player's matches against the persisted critique
+    matches = _get_player_matches(tournament, player_name)
+    if len(matches) == 0:
+        return "n/a"
 
-    for match in tournament["matches"].values():
-        if match["result"]["winner"] in ("DRAW", "DNP"):
-            continue
+    matches_hash = _get_matches_hash(tournament, matches)
+    if player_name in critiques and critiques[player_name].get("matches") == matches_hash:
+        return critiques[player_name]["critique"]
 
-        assessment = match["result"]["assessment"]
-        if match["player_A"]["name"] == player_name:
-            assessment = assessment.replace("Player A", player_name)
-            assessment = assessment.replace("Player B", "the opponent")
-        elif match["player_B"]["name"] == player_name:
-            assessment = assessment.replace("Player A", "the opponent")
-            assessment = assessment.replace("Player B", player_name)
-        else:
-            # not a match involving this player
-            continue
+    # evaluate
+    critique = critique_assessments(
+        player_name,
+        tournament["comparison"]["objective"],
+        _collect_assessments(player_name, matches),
+    )
 
-        assessments.append(assessment)
+    _store_critique(tournament, player_name, matches_hash, critique)
+    return critique
 
-    # evaluate
-    if len(assessments) > 0:
-        random.shuffle(assessments)
-        assessments = assessments[:50]
-
-        critique = complete(
-            CRITIQUE_MODEL,
-            1.0,
-            prompt=CRITIQUE_PROMPT.format(
-                player=player_name,
-                assessments="\n".join(["- " + a for a in assessments]),
-                objective=tournament["evaluation"]["objective"],
-            ),
+
+##############################################
+def get_player_critiques(tournament, player_names, do_critique):
+    """Evaluate the strengths and weaknesses of several players concurrently"""
+
+    player_names = list(player_names)
+    if not do_critique or len(player_names) == 0:
+        return {player_name: "n/a" for player_name in player_names}
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=CRITIQUE_WORKERS
+    ) as executor:
+        critiques = executor.map(
+            lambda player_name: get_player_critique(tournament, player_name, True),
+            player_names,
         )
-    else:
-        critique = "n/a"
+        return dict(zip(player_names, critiques))
 
-    tournament.get("critiques", {})[player_name] = critique
-    return critique
+
+##############################################
+def _estimate_least_squares_ratings(labels, match_sets):
+    """Estimate ELO ratings by a least-squares fit to the winning likelihoods,
+    averaged over the given sets of matches."""
+
+    observed_probs = np.zeros((len(labels), len(labels)))
+    observations = np.zeros((len(labels), len(labels)))
+    for matches in match_sets:
+        tournament_OP, tournament_O = calculate_winning_likelihoods(labels, matches)
+        observed_probs += tournament_OP
+        observations += tournament_O
+
+    elo, loss = estimate_elo(observed_probs / len(match_sets), observations)
+    print(f"LOSS: {math.sqrt(loss):.3f}")
+
+    return dict(zip(labels, elo)), None
 
 
 ##############################################
-def _generate_tournament_analysis(tournament, do_critique):
+def _estimate_bradley_terry_ratings(labels, match_sets):
+    """Estimate ELO-scaled Bradley-Terry ratings and their standard errors
+    by maximum likelihood over all given matches."""
+
+    ratings, errors = estimate_bradley_terry(
+        labels, [match for matches in match_sets for match in matches]
+    )
+
+    return dict(zip(labels, ratings)), dict(zip(labels, errors))
+
+
+# The methods to estimate ratings, by name
+RATING_METHODS = {
+    "lsq": _estimate_least_squares_ratings,
+    "bt": _estimate_bradley_terry_ratings,
+}
+
+
+##############################################
+def estimate_ratings(labels, match_sets, rating_method="lsq"):
+    """Estimate the ratings of the given players, and their standard errors if
+    the method provides them, from sets of matches."""
+
+    if rating_method not in RATING_METHODS:
+        print(f"Unknown rating method {rating_method}")
+        exit(-1)
+
+    return RATING_METHODS[rating_method](labels, match_sets)
+
+
+##############################################
+def _format_rating(ratings, errors, player_name):
+    """Format the rating of a player, with a 95% interval if available."""
+
+    if errors is None:
+        return f"{ratings[player_name]:.0f}"
+
+    return f"{ratings[player_name]:.0f} +/- {2 * errors[player_name]:.0f}"
+
+
+##############################################
+def _format_intervals(intervals, player_name):
+    """Format the bootstrap intervals of a player as table cells, if available."""
+
+    if intervals is None:
+        return ""
+
+    rating_interval = intervals[player_name]["rating_interval"]
+    score_interval = intervals[player_name]["score_interval"]
+    return (
+        f"{rating_interval[0]:.0f} - {rating_interval[1]:.0f}|"
+        f"{score_interval[0]:.2f} - {score_interval[1]:.2f}|"
+        f"{intervals[player_name]['best_probability']:.2f}|"
+    )
+
+
+##############################################
+def _generate_tournament_analysis(
+    tournament, do_critique, rating_method="lsq", bootstrap_samples=0, seed=None
+):
     """Generate a markdown analysis of the tournament."""
 
-    leaderboard = tournament["leaderboard"]
+    leaderboard = get_sorted_leaderboard(tournament)
+    stats = get_leaderboard_stats(tournament)
 
-    median = tournament["stats"]["median"]
-    average = tournament["stats"]["average"]
-    stddev = tournament["stats"]["stddev"]
+    median = stats["median"]
+    average = stats["average"]
+    stddev = stats["stddev"]
 
     # estimate ELO
-    elo, loss = estimate_elo(*calculate_winning_likelihoods(list(leaderboard.keys()), tournament["matches"].values()))
-    elo = { player_name: elo[i] for i, player_name in enumerate(leaderboard.keys()) }
-    print(f"LOSS: {math.sqrt(loss):.3f}")
+    elo, elo_errors = estimate_ratings(
+        list(leaderboard.keys()), [tournament["matches"].values()], rating_method
+    )
+
+    # bootstrap confidence intervals
+    intervals = None
+    if bootstrap_samples > 0:
+        intervals = bootstrap_ratings(
+            list(leaderboard.keys()),
+            tournament["matches"].values(),
+            rating_method,
+            bootstrap_samples,
+            seed,
+        )
+
+    # critique all players at once
+    critiques = get_player_critiques(tournament, leaderboard.keys(), do_critique)
 
     # dump as markdown
     analysis = ""
@@ -115,24 +281,27 @@ def _generate_tournament_analysis(tournament, do_critique):
     analysis += (
         f"\nMedian {median:.2f}; average {average:.2f} +/- {stddev:.2f} stddev\n"
     )
-    analysis += (
-        "\n| Player | Score | Score Dev | ELO | Analysis |\n|---|---|---|---|---|\n"
-    )
+    if intervals is not None:
+        analysis += f"\n95% intervals from {bootstrap_samples} bootstrap samples of the matches\n"
+        analysis += "\n| Player | Score | Score Dev | ELO | Rating | ELO Interval | Score Interval | P(Best) | Analysis |\n|---|---|---|---|---|---|---|---|---|\n"
+    else:
+        analysis += (
+            "\n| Player | Score | Score Dev | ELO | Rating | Analysis |\n|---|---|---|---|---|---|\n"
+        )
     for player_name, player_stat in leaderboard.items():
         score_stat = f"**{player_stat['score']:.2f}**: {player_stat['wins']}-{player_stat['draws']}-{player_stat['losses']}"
-        analysis += f"**{player_name}**|{score_stat}|{(player_stat['score'] - average)/stddev:.1f}|{elo[player_name]:.0f}|{get_player_critique(tournament, player_name, do_critique)}|\n"
+        analysis += f"**{player_name}**|{score_stat}|{(player_stat['score'] - average)/stddev:.1f}|{_format_rating(elo, elo_errors, player_name)}|{player_stat['rating']:.0f} +/- {2 * player_stat['rating_deviation']:.0f}|{_format_intervals(intervals, player_name)}{critiques[player_name]}|\n"
 
     return analysis
 
 
 ##############################################
-def _generate_competition_analysis(tournaments):
+def _generate_competition_analysis(tournaments, rating_method="lsq"):
     """Generate a markdown analysis of the entire competition."""
 
     # collect aggregated stats per tournament and player
     aggregated_stats = {}
-    observed_probs = None
-    observations = None
+    match_sets = []
     player_names = list(next(iter(tournaments.values()))["players"])
     for tournament in tournaments.values():
         # does this tournament have a competitive evaluation?
@@ -142,14 +311,8 @@ def _generate_competition_analysis(tournaments):
 
         leaderboard = tournament["leaderboard"]
 
-        # estimate ELO
-        tournament_OP, tournament_O = calculate_winning_likelihoods(player_names, tournament["matches"].values())
-        if observed_probs is None:
-            observed_probs = tournament_OP
-            observations = tournament_O
-        else:
-            observed_probs += tournament_OP
-            observations += tournament_O
+        # collect the matches to estimate ELO
+        match_sets.append(tournament["matches"].values())
 
         for player in leaderboard:
             if player not in aggregated_stats:
@@ -191,9 +354,7 @@ def _generate_competition_analysis(tournaments):
         }
 
         # get ELO
-        elo, loss = estimate_elo(observed_probs/len(tournaments), observations)
-        elo = { player_name: elo[i] for i, player_name in enumerate(player_names) }
-        print(f"LOSS: {math.sqrt(loss):.3f}")
+        elo, elo_errors = estimate_ratings(player_names, match_sets, rating_method)
 
 
         # dump as markdown
@@ -211,142 +372,127 @@ def _generate_competition_analysis(tournaments):
 
         for player_name, player_stat in aggregated_stats.items():
             score_stat = f"**{player_stat['score']:.2f}**<br/>{player_stat['wins']}-{player_stat['draws']}-{player_stat['losses']}"
-            analysis += f"**{player_name}**|{score_stat}|{(player_stat['score'] - agg_average)/agg_stddev:.1f}|{elo[player_name]:.0f}|"
+            analysis += f"**{player_name}**|{score_stat}|{(player_stat['score'] - agg_average)/agg_stddev:.1f}|{_format_rating(elo, elo_errors, player_name)}|"
             for tournament in tournaments.values():
                 leaderboard = tournament["leaderboard"]
+                stats = get_leaderboard_stats(tournament)
                 score_stat = f"**{leaderboard[player_name]['score']:.2f}**<br/>{leaderboard[player_name]['wins']}-{leaderboard[player_name]['draws']}-{leaderboard[player_name]['losses']}"
-                analysis += f"{score_stat}|{(leaderboard[player_name]['score'] - tournament['stats']['average'])/tournament['stats']['stddev']:.1f}|"
+                analysis += f"{score_stat}|{(leaderboard[player_name]['score'] - stats['average'])/stats['stddev']:.1f}|"
             analysis += "\n"
 
     return analysis
 
 
 ##############################################
-def _plot_history(history, title, columns, axis_label, axis_min, axis_max, output_file):
-    """Plot the history of all players."""
-
-    # find the length of the longest series
-    max_length = max(len(series) for series in history.values())
-
-    # pad the shorter series with NaN values
-    padded_data = {
-        label: np.pad(
-            series, (0, max_length - len(series)), "constant", constant_values=np.nan
-        )
-        for label, series in history.items()
-    }
-
-    # convert dictionary to DataFrame
-    df = pd.DataFrame(padded_data)
-
-    # set up the figure and axes
-    _fig, ax = plt.subplots(figsize=(12, 8))
-
-    # plot using Seaborn with explicit line styles
-    for column in columns:
-        sns.lineplot(data=df[column], ax=ax, label=column, linestyle="-", errorbar=None)
-
-    # adjust the plot area to make room for the legend
-    plt.subplots_adjust(right=0.8)
-
-    # customize the chart
-    ax.set_xlabel("Match")
-    ax.set_ylabel(axis_label)
-    ax.set_title(title)
-    ax.set_ylim(axis_min, axis_max)
-    ax.legend(df.columns, bbox_to_anchor=(1.01, 1.01), loc="upper left")
-
-    # Save the chart as a PNG file
-    plt.savefig(output_file)
-    plt.close()
-
-
-
-##############################################
-def plot_score_history(leaderboard, output_file):
-    """Plot the score history of all players."""
-    _plot_history(
-        {k: v["score_history"] for k, v in leaderboard.items()},
-        "Score evolution",
-        leaderboard.keys(),
-        "ELO",
-        0,
-        1,
-        output_file,
+def _get_analysis_fingerprint(tournament, options):
+    """Fingerprint the inputs of a tournament's analysis: its players, matches,
+    grades, grade points and the analysis options"""
+
+    return content_hash(
+        [
+            options,
+            (tournament["grading"] or {}).get("points"),
+            {
+                player_name: player["fingerprint"]
+                for player_name, player in tournament["players"].items()
+            },
+            sorted(
+                [match_name, match["result"]["winner"], match.get("fingerprint", "")]
+                for match_name, match in tournament["matches"].items()
+            ),
+            sorted(
+                [grade_name, grade["grade"], grade.get("fingerprint", "")]
+                for grade_name, grade in tournament["grades"].items()
+            ),
+        ]
     )
 
 
 ##############################################
-def _plot_matrix(matrix, labels, fstring, output_file):
-    """Plot a matrix of scores."""
-
-    plt.figure(figsize=(10, 8))
-
-    # Create a heatmap using Seaborn
-    ax = sns.heatmap(
-        matrix,
-        annot=False,
-        cmap="coolwarm",
-        fmt=".2f",
-        square=True,
-        xticklabels=labels,
-        yticklabels=labels,
-    )
+def _get_analysis_outputs(tournament, path, export_format):
+    """Get the files the analysis of a tournament writes"""
 
-    # Add text annotations to the heatmap
-    for i in range(len(labels)):
-        for j in range(len(labels)):
-            if i != j:
-                ax.text(
-                    j + 0.5,
-                    i + 0.5,
-                    fstring.format(value=matrix[i, j]),
-                    ha="center",
-                    va="center",
-                )
+    tournament_name = tournament["meta"]["tournament"]
 
-    # Customize the plot
-    plt.title("Score Matrix")
-    plt.xticks(rotation=90, fontsize=7)
-    plt.yticks(rotation=0, fontsize=7)
+    outputs = []
+    if tournament["comparison"] is not None:
+        outputs.append(f"{path}/{tournament_name}.md")
+        outputs.append(f"{path}/{tournament_name}-score-history.png")
+        outputs.append(f"{path}/{tournament_name}-score-matrix.png")
+        outputs.append(f"{path}/{tournament_name}-game-matrix.png")
+    if tournament["grading"] is not None:
+        outputs.append(f"{path}/{tournament_name}-grades.md")
+        outputs.append(f"{path}/{tournament_name}.{export_format}")
 
-    # Save the chart as a PNG file
-    plt.savefig(output_file)
-    plt.close()
+    return outputs
 
 
 ##############################################
-def plot_score_matrix(players, matches, games_output_file, scores_output_file):
-    """Plot a matrix of score stats of each player pair."""
+def _read_analysis_manifest(path):
+    """Read the fingerprints of the tournaments analyzed into a directory"""
 
-    # Create a matrix of scores
-    labels = list(players)
-    matrix, match_count = calculate_winning_likelihoods(labels, matches)
+    manifest_filename = f"{path}/{ANALYSIS_MANIFEST}"
+    if not os.path.exists(manifest_filename):
+        return {}
 
-    _plot_matrix(match_count, labels, "{value:.0f}", games_output_file)
-    _plot_matrix(matrix, labels, "{value:.2f}", scores_output_file)
+    try:
+        return read_json(manifest_filename)
+    except ValueError:
+        print(f"      WARNING: ignoring corrupt manifest {manifest_filename}")
+        return {}
 
 
 ##############################################
-def analyze_tournaments(tournaments, do_critique):
-    """Analyze player performance for given tournaments."""
+def analyze_tournaments(
+    tournaments,
+    do_critique,
+    rating_method="lsq",
+    bootstrap_samples=0,
+    seed=None,
+    skip_unchanged=False,
+    force=False,
+    export_format="xlsx",
+):
+    """Analyze player performance for given tournaments, skipping the tournaments
+    whose inputs are unchanged since their last analysis unless forced."""
 
     competition = next(iter(tournaments.values()))["meta"]["competition"]["name"]
+    player_set = next(iter(tournaments.values()))["meta"]["player_set"]
+
+    # prepare output location
+    path = f"competitions/{competition}/analysis/{player_set}"
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    manifest = _read_analysis_manifest(path)
+    options = [do_critique, rating_method, bootstrap_samples, seed, export_format]
+
+    # charts are collected and rendered together
+    charts = []
 
     # perform analysis per tournament
     for tournament in tournaments.values():
-        # prepare output location
-        player_set = tournament["meta"]["player_set"]
         tournament_name = tournament["meta"]["tournament"]
 
-        path = f"competitions/{competition}/analysis/{player_set}"
-        if not os.path.exists(path):
-            os.makedirs(path)
+        # skip if nothing changed
+        fingerprint = _get_analysis_fingerprint(tournament, options)
+        if (
+            not force
+            and manifest.get(tournament_name) == fingerprint
+            and all(
+                os.path.exists(output)
+                for output in _get_analysis_outputs(tournament, path, export_format)
+            )
+        ):
+            print(f"  {tournament_name.upper()} unchanged, skipping analysis")
+            continue
 
         # does this tournament have a competitive evaluation?
         if tournament["comparison"] is not None:
             # obtain the analysis
-            analysis = _generate_tournament_analysis(tournament, do_critique)
+            analysis = _generate_tournament_analysis(
+                tournament, do_critique, rating_method, bootstrap_samples, seed
+            )
 
             with open(f"{path}/{tournament_name}.md", "w") as f:
                 f.write(
@@ -356,45 +502,70 @@ def analyze_tournaments(tournaments, do_critique):
                     + f"\n\n### Game Matrix\n![Game Matrix](./{tournament_name}-game-matrix.png)"
                 )
 
-            # plot histories
-            plot_score_history(
-                tournament["leaderboard"],
+            # plot histories and score matrix
+            charts_fingerprint = get_matches_fingerprint(
+                tournament["players"], tournament["matches"]
+            )
+            charts += get_score_history_charts(
+                get_sorted_leaderboard(tournament),
                 f"{path}/{tournament_name}-score-history.png",
+                charts_fingerprint,
             )
-
-            # plot score matrix
-            plot_score_matrix(
+            charts += get_score_matrix_charts(
                 tournament["players"],
                 tournament["matches"].values(),
                 f"{path}/{tournament_name}-game-matrix.png",
                 f"{path}/{tournament_name}-score-matrix.png",
+                charts_fingerprint,
             )
 
         # does this tournament have a grading evaluation?
         if tournament["grading"] is not None:
-            # just export an excel with the grades
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "Grades"
-            
-            for g in tournament["grades"].values():
-                # write header
-                if len(sheet["A"]) == 1:
-                    sheet.append(["Player", "Grade", *g["challenge_details"].keys(), "Reasoning", "Output"])
-                    
-                sheet.append([g["player"]["name"], g["grade"], *g["challenge_details"].values(), g["reasoning"], g["player_output"]])
-
-            workbook.save( f"{path}/{tournament_name}.xlsx")
-
-
-    # now perform grand joint analysis
+            # analyze the grades
+            with open(f"{path}/{tournament_name}-grades.md", "w") as f:
+                f.write(generate_grade_analysis(tournament))
+
+            # and export them for further processing
+            export_grades(
+                tournament["grades"].values(),
+                f"{path}/{tournament_name}.{export_format}",
+                export_format,
+            )
+
+        manifest[tournament_name] = fingerprint
+
+    # render all charts in parallel
+    render_charts(charts, skip_unchanged)
+
+    # record the inputs of the analyzed tournaments, once their outputs are written
+    write_file(f"{path}/{ANALYSIS_MANIFEST}", json.dumps(manifest))
+
+    # now always refresh the grand joint analysis
     with open(f"{path}/_analysis.md", "w") as f:
-        f.write(_generate_competition_analysis(tournaments))
+        f.write(_generate_competition_analysis(tournaments, rating_method))
 
 
 ##############################################
-def analyze(competition, tournament, player_set, do_critique):
+def analyze(
+    competition,
+    tournament,
+    player_set,
+    do_critique,
+    rating_method="lsq",
+    bootstrap_samples=0,
+    seed=None,
+    skip_unchanged=False,
+    force=False,
+    export_format="xlsx",
+):
     """Analyze player performance for a given competition."""
     analyze_tournaments(
-        load_tournaments(competition, tournament, player_set), do_critique
+        load_tournaments(competition, tournament, player_set),
+        do_critique,
+        rating_method,
+        bootstrap_samples,
+        seed,
+        skip_unchanged,
+        force,
+        export_format,
     )
@@ -0,0 +1,132 @@
+import os
+import concurrent.futures
+import numpy as np
+from analyze.elo import encode_matches, build_win_matrix, estimate_elo
+from analyze.bradley_terry import fit_bradley_terry
+
+# The number of bootstrap samples computed per task of the process pool
+BOOTSTRAP_CHUNK_SIZE = 25
+
+# The confidence level of the reported intervals
+CONFIDENCE_LEVEL = 0.95
+
+
+##############################################
+def _fit_least_squares(number_players, player_A, player_B, points_A):
+    """Fit ELO ratings by least squares to the winning likelihoods of encoded matches."""
+    return estimate_elo(*build_win_matrix(number_players, player_A, player_B, points_A))[0]
+
+
+##############################################
+def _fit_bradley_terry(number_players, player_A, player_B, points_A):
+    """Fit Bradley-Terry ratings to encoded matches."""
+    return fit_bradley_terry(
+        number_players, player_A, player_B, points_A, standard_errors=False
+    )[0]
+
+
+# The rating fits on encoded matches, by rating method
+BOOTSTRAP_RATING_METHODS = {
+    "lsq": _fit_least_squares,
+    "bt": _fit_bradley_terry,
+}
+
+
+##############################################
+def _get_scores(number_players, player_A, player_B, points_A):
+    """Get the match score of each player, 0.5 for players without matches."""
+
+    points = np.bincount(player_A, weights=points_A, minlength=number_players)
+    points += np.bincount(player_B, weights=1.0 - points_A, minlength=number_players)
+    matches = np.bincount(player_A, minlength=number_players) + np.bincount(
+        player_B, minlength=number_players
+    )
+
+    return np.divide(
+        points, matches, out=np.full(number_players, 0.5), where=matches > 0
+    )
+
+
+##############################################
+def _bootstrap_chunk(
+    number_players, player_A, player_B, points_A, rating_method, seed, samples
+):
+    """Compute ratings and scores of a number of resamples of the matches."""
+
+    rng = np.random.default_rng(seed)
+    fit = BOOTSTRAP_RATING_METHODS[rating_method]
+
+    ratings = np.empty((samples, number_players))
+    scores = np.empty((samples, number_players))
+    for sample in range(samples):
+        resample = rng.integers(0, len(points_A), len(points_A))
+        encoded = (player_A[resample], player_B[resample], points_A[resample])
+
+        # ratings are only determined up to an offset; center them
+        sample_ratings = fit(number_players, *encoded)
+        ratings[sample] = sample_ratings - np.mean(sample_ratings)
+        scores[sample] = _get_scores(number_players, *encoded)
+
+    return ratings, scores
+
+
+##############################################
+def bootstrap_ratings(
+    labels, matches, rating_method="lsq", samples=1000, seed=None, max_workers=None
+):
+    """Resample the matches to obtain confidence intervals of the players' ratings
+    and scores, and the probability of each player to be the best.
+
+    The resamples are computed in a process pool; given a seed, the results do not
+    depend on the number of workers."""
+
+    number_players = len(labels)
+    player_A, player_B, points_A = encode_matches(labels, matches)
+    if len(points_A) == 0:
+        return None
+
+    # reference ratings to shift the centered resampled ratings back to
+    ratings = BOOTSTRAP_RATING_METHODS[rating_method](
+        number_players, player_A, player_B, points_A
+    )
+
+    # one independent random stream per chunk of samples
+    chunk_sizes = [
+        min(BOOTSTRAP_CHUNK_SIZE, samples - start)
+        for start in range(0, samples, BOOTSTRAP_CHUNK_SIZE)
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    args = [
+        (number_players, player_A, player_B, points_A, rating_method, seed, size)
+        for seed, size in zip(seeds, chunk_sizes)
+    ]
+
+    if len(args) < 2:
+        results = [_bootstrap_chunk(*arg) for arg in args]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count()
+        ) as executor:
+            results = list(executor.map(_bootstrap_chunk, *zip(*args)))
+
+    sample_ratings = np.concatenate([result[0] for result in results]) + np.mean(
+        ratings
+    )
+    sample_scores = np.concatenate([result[1] for result in results])
+
+    # percentile intervals
+    bounds = [50 * (1 - CONFIDENCE_LEVEL), 50 * (1 + CONFIDENCE_LEVEL)]
+    rating_intervals = np.percentile(sample_ratings, bounds, axis=0)
+    score_intervals = np.percentile(sample_scores, bounds, axis=0)
+
+    # the share of samples in which each player has the best rating
+    best = np.bincount(np.argmax(sample_ratings, axis=1), minlength=number_players)
+
+    return {
+        label: {
+            "rating_interval": (rating_intervals[0][i], rating_intervals[1][i]),
+            "score_interval": (score_intervals[0][i], score_intervals[1][i]),
+            "best_probability": best[i] / samples,
+        }
+        for i, label in enumerate(labels)
+    }
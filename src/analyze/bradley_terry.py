@@ -0,0 +1,189 @@
+import math
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+from scipy.special import expit
+from analyze.elo import encode_matches
+
+# The average rating of the players, on the ELO scale
+BASE_RATING = 1500
+
+# The number of virtual draws of each player against an average player; this
+# keeps the ratings of undefeated or winless players finite
+PRIOR_GAMES = 1.0
+
+# The convergence tolerance of the log-strengths, and the maximum number of Newton steps
+CONVERGENCE_TOLERANCE = 1e-8
+MAX_ITERATIONS = 100
+
+# The maximum number of players for which standard errors are computed from the
+# full covariance; beyond it, correlations between players are neglected
+MAX_PLAYERS_FULL_COVARIANCE = 1000
+
+
+##############################################
+def get_pair_results(number_players, player_A, player_B, points_A):
+    """Aggregate encoded matches into the observed player pairs, returning the
+    indices of both players, the points of the first and the number of games."""
+
+    first = np.minimum(player_A, player_B)
+    second = np.maximum(player_A, player_B)
+    points_first = np.where(player_A == first, points_A, 1.0 - points_A)
+
+    pairs, pair_index = np.unique(
+        first * number_players + second, return_inverse=True
+    )
+
+    return (
+        pairs // number_players,
+        pairs % number_players,
+        np.bincount(pair_index, weights=points_first, minlength=len(pairs)),
+        np.bincount(pair_index, minlength=len(pairs)).astype(float),
+    )
+
+
+##############################################
+def _get_log_likelihood(log_strengths, first, second, points, games):
+    """Compute the log-likelihood of the log-strengths, including the virtual draws."""
+
+    return (
+        np.sum(
+            points * log_strengths[first]
+            + (games - points) * log_strengths[second]
+            - games * np.logaddexp(log_strengths[first], log_strengths[second])
+        )
+        + PRIOR_GAMES
+        * np.sum(0.5 * log_strengths - np.logaddexp(log_strengths, 0.0))
+    )
+
+
+##############################################
+def _get_information(log_strengths, first, second, games):
+    """Compute the sparse observed Fisher information of the log-strengths,
+    and the expected points of each player."""
+
+    number_players = len(log_strengths)
+    win_probs = expit(log_strengths[first] - log_strengths[second])
+    pair_information = games * win_probs * (1.0 - win_probs)
+    prior_probs = expit(log_strengths)
+
+    diagonal = (
+        PRIOR_GAMES * prior_probs * (1.0 - prior_probs)
+        + np.bincount(first, weights=pair_information, minlength=number_players)
+        + np.bincount(second, weights=pair_information, minlength=number_players)
+    )
+    information = scipy.sparse.coo_matrix(
+        (
+            np.concatenate([diagonal, -pair_information, -pair_information]),
+            (
+                np.concatenate([np.arange(number_players), first, second]),
+                np.concatenate([np.arange(number_players), second, first]),
+            ),
+        ),
+        shape=(number_players, number_players),
+    ).tocsc()
+
+    expected_points = (
+        PRIOR_GAMES * prior_probs
+        + np.bincount(first, weights=games * win_probs, minlength=number_players)
+        + np.bincount(
+            second, weights=games * (1.0 - win_probs), minlength=number_players
+        )
+    )
+
+    return information, expected_points
+
+
+##############################################
+def _fit_log_strengths(number_players, first, second, points, games):
+    """Fit Bradley-Terry log-strengths by maximum likelihood with Newton's method,
+    solving the sparse information matrix of the observed pairs in each step."""
+
+    # total points of each player, including the virtual draws
+    total_points = (
+        np.bincount(first, weights=points, minlength=number_players)
+        + np.bincount(second, weights=games - points, minlength=number_players)
+        + 0.5 * PRIOR_GAMES
+    )
+
+    log_strengths = np.zeros(number_players)
+    log_likelihood = _get_log_likelihood(log_strengths, first, second, points, games)
+    for _iteration in range(MAX_ITERATIONS):
+        information, expected_points = _get_information(
+            log_strengths, first, second, games
+        )
+        step = scipy.sparse.linalg.spsolve(information, total_points - expected_points)
+
+        # halve the step until the likelihood improves
+        step_size = 1.0
+        while True:
+            updated_log_strengths = log_strengths + step_size * step
+            updated_log_likelihood = _get_log_likelihood(
+                updated_log_strengths, first, second, points, games
+            )
+            if updated_log_likelihood >= log_likelihood or step_size < 1e-6:
+                break
+            step_size /= 2.0
+
+        log_strengths = updated_log_strengths
+        log_likelihood = updated_log_likelihood
+        if np.max(np.abs(step_size * step)) < CONVERGENCE_TOLERANCE:
+            break
+
+    return log_strengths
+
+
+##############################################
+def _get_standard_errors(log_strengths, first, second, games):
+    """Compute the standard errors of the log-strengths, relative to their mean,
+    from the observed Fisher information."""
+
+    information, _expected_points = _get_information(
+        log_strengths, first, second, games
+    )
+
+    # for many players, approximate by the conditional variances, which only
+    # need the diagonal of the sparse information
+    if len(log_strengths) > MAX_PLAYERS_FULL_COVARIANCE:
+        return 1.0 / np.sqrt(information.diagonal())
+
+    # ratings are reported relative to their mean, which removes the weakly
+    # determined common offset from the covariance
+    covariance = np.linalg.inv(information.toarray())
+    variances = (
+        np.diag(covariance)
+        - 2.0 * np.mean(covariance, axis=1)
+        + np.mean(covariance)
+    )
+
+    return np.sqrt(np.maximum(variances, 0.0))
+
+
+##############################################
+def fit_bradley_terry(
+    number_players, player_A, player_B, points_A, standard_errors=True
+):
+    """Fit ELO-scaled Bradley-Terry ratings, and their standard errors if requested,
+    to encoded matches given as player indices and points of player A."""
+
+    first, second, points, games = get_pair_results(
+        number_players, player_A, player_B, points_A
+    )
+    log_strengths = _fit_log_strengths(number_players, first, second, points, games)
+
+    # convert to the ELO scale, centered on the base rating
+    scale = 400 / math.log(10)
+    ratings = BASE_RATING + scale * (log_strengths - np.mean(log_strengths))
+
+    if not standard_errors:
+        return ratings, None
+
+    return ratings, scale * _get_standard_errors(log_strengths, first, second, games)
+
+
+##############################################
+def estimate_bradley_terry(labels, matches):
+    """Estimates ELO-scaled Bradley-Terry ratings and their standard errors by
+    maximum likelihood, counting draws as half a win for each player."""
+
+    return fit_bradley_terry(len(labels), *encode_matches(labels, matches))
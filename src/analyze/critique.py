@@ -0,0 +1,184 @@
+import random
+import functools
+import concurrent.futures
+from llm import complete
+
+# use the model's tokenizer to budget prompts when available
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+CRITIQUE_MODEL = "gpt-4-1106-preview"
+
+# The number of completions requested concurrently
+CRITIQUE_WORKERS = 8
+
+# The maximum number of tokens of assessments or partial critiques in one prompt
+CRITIQUE_CHUNK_TOKENS = 8000
+
+# The maximum number of assessments sampled per player, bounding the cost of a critique
+CRITIQUE_MAX_ASSESSMENTS = 500
+
+##############################################
+CRITIQUE_PROMPT = """The player {player} is participating in a tournament with the aim to {objective}. The player has received the following assessments of their performance against opponents in their matches:
+
+{assessments}
+
+Silently analyze the performance of the player {player} across all these assessments.
+
+Then, firstly, give a detailed and highly specific assessment of the strengths of the player in a bullet list.
+
+Then, secondly, giuve a detailed and highly specific assessment of the weaknesses of the player in a bullet list.
+
+Provide your response in like this:
+
+STRENGTHS:
+- ...
+- ...
+- ...
+
+WEAKNESSES:
+- ...
+- ...
+- ...
+
+Now, it is time to provide your response."""
+
+##############################################
+MERGE_CRITIQUE_PROMPT = """The player {player} is participating in a tournament with the aim to {objective}. Several reviewers have each analyzed a different part of the assessments of the player's performance against opponents in their matches, and came to the following critiques:
+
+{critiques}
+
+Silently consolidate these critiques of the player {player}, giving more weight to strengths and weaknesses that several reviewers observed.
+
+Then, firstly, give a detailed and highly specific assessment of the strengths of the player in a bullet list.
+
+Then, secondly, give a detailed and highly specific assessment of the weaknesses of the player in a bullet list.
+
+Provide your response in like this:
+
+STRENGTHS:
+- ...
+- ...
+- ...
+
+WEAKNESSES:
+- ...
+- ...
+- ...
+
+Now, it is time to provide your response."""
+
+
+##############################################
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """Get the tokenizer of the critique model"""
+    return tiktoken.get_encoding("cl100k_base")
+
+
+##############################################
+def count_tokens(text):
+    """Count, or without a tokenizer estimate, the number of tokens of a text"""
+
+    if tiktoken is not None:
+        return len(_get_encoding().encode(text))
+
+    return len(text) // 4 + 1
+
+
+##############################################
+def _split_into_chunks(texts, token_budget):
+    """Split texts into consecutive chunks of at most the given number of tokens;
+    a text exceeding the budget on its own forms a chunk by itself"""
+
+    chunks = [[]]
+    chunk_tokens = 0
+    for text in texts:
+        text_tokens = count_tokens(text)
+        if len(chunks[-1]) > 0 and chunk_tokens + text_tokens > token_budget:
+            chunks.append([])
+            chunk_tokens = 0
+
+        chunks[-1].append(text)
+        chunk_tokens += text_tokens
+
+    return chunks
+
+
+##############################################
+def _run_in_parallel(fun, args):
+    """Run a function on arguments concurrently, returning the results in order"""
+
+    if len(args) < 2:
+        return [fun(arg) for arg in args]
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(len(args), CRITIQUE_WORKERS)
+    ) as executor:
+        return list(executor.map(fun, args))
+
+
+##############################################
+def _critique_chunk(player_name, objective, assessments):
+    """Critique a player based on a chunk of their assessments"""
+
+    return complete(
+        CRITIQUE_MODEL,
+        prompt=CRITIQUE_PROMPT.format(
+            player=player_name,
+            assessments="\n".join(["- " + a for a in assessments]),
+            objective=objective,
+        ),
+        temperature=1.0,
+    )
+
+
+##############################################
+def _merge_critiques(player_name, objective, critiques):
+    """Consolidate several partial critiques of a player into one"""
+
+    return complete(
+        CRITIQUE_MODEL,
+        prompt=MERGE_CRITIQUE_PROMPT.format(
+            player=player_name,
+            critiques="\n\n".join(
+                [f"Critique {i + 1}:\n{c}" for i, c in enumerate(critiques)]
+            ),
+            objective=objective,
+        ),
+        temperature=1.0,
+    )
+
+
+##############################################
+def critique_assessments(player_name, objective, assessments):
+    """Critique a player based on their assessments.
+
+    Assessments that fit into one prompt are critiqued at once; otherwise they are
+    split into token-budgeted chunks that are critiqued in parallel (map), and the
+    partial critiques are then consolidated level by level into one (reduce)."""
+
+    assessments = list(assessments)
+    random.shuffle(assessments)
+    assessments = assessments[:CRITIQUE_MAX_ASSESSMENTS]
+
+    # map
+    critiques = _run_in_parallel(
+        lambda chunk: _critique_chunk(player_name, objective, chunk),
+        _split_into_chunks(assessments, CRITIQUE_CHUNK_TOKENS),
+    )
+
+    # reduce
+    while len(critiques) > 1:
+        groups = _split_into_chunks(critiques, CRITIQUE_CHUNK_TOKENS)
+        if len(groups) == len(critiques):
+            # every critique fills a prompt on its own; merge them pairwise
+            groups = [critiques[i : i + 2] for i in range(0, len(critiques), 2)]
+
+        critiques = _run_in_parallel(
+            lambda group: _merge_critiques(player_name, objective, group), groups
+        )
+
+    return critiques[0]
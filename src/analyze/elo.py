@@ -1,40 +1,84 @@
-import math 
+import math
 import numpy as np
+import scipy.sparse
 from scipy.optimize import minimize
 
 
 ##############################################
-def calculate_winning_likelihoods(labels, matches):
-    """Plot a matrix of score stats of each player pair."""
+def encode_matches(labels, matches):
+    """Encode the decided matches among the given players as arrays of the
+    indices of players A and B and the points of player A."""
 
-    # Create a matrix of scores
-    matrix = np.zeros((len(labels), len(labels)))
-    match_count = np.zeros((len(labels), len(labels)))
+    player_index = {label: i for i, label in enumerate(labels)}
 
+    player_A = []
+    player_B = []
+    points_A = []
     for match in matches:
         player_A_name = match["player_A"]["name"]
         player_B_name = match["player_B"]["name"]
 
         if match["result"]["winner"] == "DRAW":
-            matrix[labels.index(player_A_name), labels.index(player_B_name)] += 0.5
-            matrix[labels.index(player_B_name), labels.index(player_A_name)] += 0.5
+            points = 0.5
         elif match["result"]["winner"] == player_A_name:
-            matrix[labels.index(player_A_name), labels.index(player_B_name)] += 1.0
+            points = 1.0
         elif match["result"]["winner"] == player_B_name:
-            matrix[labels.index(player_B_name), labels.index(player_A_name)] += 1.0
+            points = 0.0
         else:
             # ignore DNP
             continue
 
-        match_count[labels.index(player_A_name), labels.index(player_B_name)] += 1
-        match_count[labels.index(player_B_name), labels.index(player_A_name)] += 1
+        player_A.append(player_index[player_A_name])
+        player_B.append(player_index[player_B_name])
+        points_A.append(points)
 
-    # divide matrix by number of matches
-    matrix = np.divide(
-        matrix, match_count, out=np.zeros_like(matrix), where=matches != 0
+    return (
+        np.array(player_A, dtype=np.intp),
+        np.array(player_B, dtype=np.intp),
+        np.array(points_A, dtype=float),
     )
 
-    return matrix, match_count
+
+##############################################
+def build_win_matrix(number_players, player_A, player_B, points_A, sparse=False):
+    """Build the matrix of winning likelihoods and the matrix of match counts
+    of each player pair from encoded matches, as scipy sparse matrices if requested."""
+
+    # accumulate points and counts per directed player pair
+    rows = np.concatenate([player_A, player_B])
+    columns = np.concatenate([player_B, player_A])
+    pairs, pair_index = np.unique(rows * number_players + columns, return_inverse=True)
+    points = np.bincount(
+        pair_index,
+        weights=np.concatenate([points_A, 1.0 - points_A]),
+        minlength=len(pairs),
+    )
+    match_count = np.bincount(pair_index, minlength=len(pairs)).astype(float)
+
+    # divide points by number of matches
+    rows = pairs // number_players
+    columns = pairs % number_players
+    shape = (number_players, number_players)
+    if sparse:
+        return (
+            scipy.sparse.csr_matrix((points / match_count, (rows, columns)), shape),
+            scipy.sparse.csr_matrix((match_count, (rows, columns)), shape),
+        )
+
+    matrix = np.zeros(shape)
+    matrix[rows, columns] = points / match_count
+    counts = np.zeros(shape)
+    counts[rows, columns] = match_count
+
+    return matrix, counts
+
+
+##############################################
+def calculate_winning_likelihoods(labels, matches, sparse=False):
+    """Calculate the likelihood of each player to win against each other player,
+    and the number of matches of each pair; unplayed pairs are zero."""
+
+    return build_win_matrix(len(labels), *encode_matches(labels, matches), sparse)
 
 
 ##############################################
@@ -44,32 +88,59 @@ def _elo_prob(delta_R):
 
 
 ##############################################
-def _loss_function(R, observed_probs, observations):
-    """Computes the loss (sum of squared differences) between observed
-    probabilities and those given by the ELO model."""
-    loss = 0.0
-    count = 0
-    for i in range(observed_probs.shape[0]):
-        for j in range(observed_probs.shape[1]):
-            if i == j:
-                continue
+def _prepare_observations(observed_probs, observations):
+    """Mask the observed player pairs and compute their clipped probabilities
+    and weights for the loss function."""
 
-            number_of_obs = observations[i, j]
-            if number_of_obs == 0:
-                continue
+    mask = observations > 0
+    np.fill_diagonal(mask, False)
 
-            observed_prob = observed_probs[i, j]
-            if observed_prob == 0:
-                observed_prob = 0.01
-            if observed_prob == 1:
-                observed_prob = 0.99
+    # unobserved pairs may hold NaN; keep them out of the arithmetic
+    observed_prob = np.where(mask, observed_probs, 0.5)
+    observed_prob = np.where(observed_prob == 0, 0.01, observed_prob)
+    observed_prob = np.where(observed_prob == 1, 0.99, observed_prob)
 
-            weight = 1.0 / math.sqrt(observed_prob * (1 - observed_prob) / number_of_obs)
-            expected_prob = _elo_prob(R[i] - R[j])
-            loss += weight * (observed_prob - expected_prob) ** 2
-            count += 1
+    weight = np.zeros_like(observed_prob, dtype=float)
+    weight[mask] = 1.0 / np.sqrt(
+        observed_prob[mask] * (1 - observed_prob[mask]) / observations[mask]
+    )
+
+    return mask, observed_prob, weight
+
+
+##############################################
+def _loss_and_gradient(R, mask, observed_prob, weight):
+    """Computes the loss (mean weighted squared difference) between observed
+    probabilities and those given by the ELO model, and its gradient."""
+
+    count = np.count_nonzero(mask)
+    if count == 0:
+        return 0.0, np.zeros_like(R)
+
+    expected_prob = _elo_prob(R[:, np.newaxis] - R[np.newaxis, :])
+    difference = np.where(mask, observed_prob - expected_prob, 0.0)
+    loss = np.sum(weight * difference**2) / count
+
+    # derivative of each pair's term with respect to R[i]; R[j] gets the negative
+    pair_gradient = (
+        -2.0
+        * weight
+        * difference
+        * expected_prob
+        * (1 - expected_prob)
+        * math.log(10)
+        / 400
+    )
+    gradient = (pair_gradient.sum(axis=1) - pair_gradient.sum(axis=0)) / count
 
-    return loss / count
+    return loss, gradient
+
+
+##############################################
+def _loss_function(R, observed_probs, observations):
+    """Computes the loss (sum of squared differences) between observed
+    probabilities and those given by the ELO model."""
+    return _loss_and_gradient(R, *_prepare_observations(observed_probs, observations))[0]
 
 
 ##############################################
@@ -78,17 +149,16 @@ def estimate_elo(observed_probs, observations):
     probabilities of the first player winning."""
 
     # set initial ELO
-    initial_R = 1000 * np.ones(observed_probs.shape[0])
-    additional_R = np.nansum(observed_probs, axis=1) / observed_probs.shape[0]
-    for i in range(observed_probs.shape[0]):
-        initial_R[i] += 500 * additional_R[i]
+    initial_R = 1000 + 500 * np.nansum(observed_probs, axis=1) / observed_probs.shape[0]
 
-    # iterate
+    # iterate with the analytic gradient
+    prepared = _prepare_observations(observed_probs, observations)
     res = minimize(
-        fun=_loss_function,
+        fun=_loss_and_gradient,
         x0=initial_R,
-        args=(observed_probs, observations),
+        args=prepared,
+        jac=True,
         method="L-BFGS-B",  # This is a bounded version of the BFGS algorithm
     )
 
-    return res.x, _loss_function(res.x, observed_probs, observations) 
+    return res.x, _loss_and_gradient(res.x, *prepared)[0]
@@ -0,0 +1,123 @@
+import csv
+import json
+
+# The number of rows written to a Parquet file at once
+PARQUET_BATCH_SIZE = 10000
+
+
+##############################################
+def _format_cell(value):
+    """Format a value for a cell, serializing nested structures as JSON"""
+
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+
+    return value
+
+
+##############################################
+def _get_grade_rows(grades):
+    """Yield the header and then one row per grade, loading each grade's body
+    from storage only while its row is written"""
+
+    details_keys = None
+    for grade in grades:
+        challenge_details = grade["challenge_details"]
+
+        # the header follows the challenge details of the first grade
+        if details_keys is None:
+            details_keys = list(challenge_details.keys())
+            yield ["Player", "Grade", *details_keys, "Reasoning", "Output"]
+
+        yield [
+            grade["player"]["name"],
+            grade["grade"],
+            *[_format_cell(challenge_details.get(key, "")) for key in details_keys],
+            grade["reasoning"],
+            grade["player_output"],
+        ]
+
+
+##############################################
+def _export_xlsx(rows, filename):
+    """Stream rows into an Excel workbook in write-only mode"""
+
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Grades")
+    for row in rows:
+        sheet.append(row)
+
+    workbook.save(filename)
+
+
+##############################################
+def _export_csv(rows, filename):
+    """Stream rows into a CSV file"""
+
+    with open(filename, "w", newline="") as file:
+        writer = csv.writer(file)
+        for row in rows:
+            writer.writerow(row)
+
+
+##############################################
+def _write_parquet_batch(writer, schema, batch):
+    """Write a batch of rows as string columns to a Parquet writer"""
+
+    import pyarrow
+
+    writer.write_table(
+        pyarrow.Table.from_arrays(
+            [pyarrow.array(column, pyarrow.string()) for column in zip(*batch)],
+            schema=schema,
+        )
+    )
+
+
+##############################################
+def _export_parquet(rows, filename):
+    """Stream rows into a Parquet file in batches, with all columns as strings"""
+
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        print("Parquet export requires the pyarrow package")
+        exit(-1)
+
+    header = next(rows, None)
+    if header is None:
+        return
+
+    schema = pyarrow.schema([(column, pyarrow.string()) for column in header])
+    with pyarrow.parquet.ParquetWriter(filename, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(["" if cell is None else str(cell) for cell in row])
+            if len(batch) >= PARQUET_BATCH_SIZE:
+                _write_parquet_batch(writer, schema, batch)
+                batch = []
+
+        if len(batch) > 0:
+            _write_parquet_batch(writer, schema, batch)
+
+
+# The grade export formats, by file suffix
+EXPORT_FORMATS = {
+    "xlsx": _export_xlsx,
+    "csv": _export_csv,
+    "parquet": _export_parquet,
+}
+
+
+##############################################
+def export_grades(grades, filename, export_format="xlsx"):
+    """Export grades to a file in the given format, streaming one grade at a time"""
+
+    if export_format not in EXPORT_FORMATS:
+        print(f"Unknown export format {export_format}")
+        exit(-1)
+
+    EXPORT_FORMATS[export_format](_get_grade_rows(grades), filename)
@@ -0,0 +1,226 @@
+import numpy as np
+from scipy.special import bdtr
+
+# The number of hardest challenges listed in the analysis
+HARDEST_CHALLENGES = 20
+
+# The significance level at which a player is reported as better than the next
+SIGNIFICANCE_LEVEL = 0.05
+
+
+##############################################
+def _get_grade_points(grade_labels, points=None):
+    """Get the points of each grade, from the grading's points mapping if given;
+    otherwise grades are ranked alphabetically from 1 (best) to 0 (worst)"""
+
+    if points is not None:
+        return np.array([float(points.get(label, np.nan)) for label in grade_labels])
+
+    if len(grade_labels) < 2:
+        return np.ones(len(grade_labels))
+
+    return 1.0 - np.arange(len(grade_labels)) / (len(grade_labels) - 1)
+
+
+##############################################
+def encode_grades(tournament):
+    """Encode the grades of a tournament as arrays of player, challenge and grade
+    indices, along with the player names, challenge names and grade labels"""
+
+    players = list(tournament["players"])
+    player_index = {player: i for i, player in enumerate(players)}
+    grades = list(tournament["grades"].values())
+
+    challenges = sorted({grade["challenge"] for grade in grades})
+    challenge_index = {challenge: i for i, challenge in enumerate(challenges)}
+
+    # order grades by points if the grading defines them
+    points = (tournament["grading"] or {}).get("points")
+    grade_labels = sorted({grade["grade"] for grade in grades})
+    if points is not None:
+        grade_labels.sort(key=lambda label: -float(points.get(label, -np.inf)))
+    grade_index = {label: i for i, label in enumerate(grade_labels)}
+
+    return (
+        np.array([player_index[g["player"]["name"]] for g in grades], dtype=np.intp),
+        np.array([challenge_index[g["challenge"]] for g in grades], dtype=np.intp),
+        np.array([grade_index[g["grade"]] for g in grades], dtype=np.intp),
+        players,
+        challenges,
+        grade_labels,
+        _get_grade_points(grade_labels, points),
+    )
+
+
+##############################################
+def _group_means(groups, values, number_groups):
+    """Get count, mean and standard error of values per group, NaN for empty groups"""
+
+    counts = np.bincount(groups, minlength=number_groups)
+    sums = np.bincount(groups, weights=values, minlength=number_groups)
+    squares = np.bincount(groups, weights=values**2, minlength=number_groups)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        variances = np.maximum(squares / counts - means**2, 0.0)
+        errors = np.sqrt(variances / np.maximum(counts - 1, 1))
+
+    return counts, means, errors
+
+
+##############################################
+def _get_agreement(cells):
+    """Correlate the points of each player pair over the challenges both were graded on"""
+
+    mask = ~np.isnan(cells)
+    present = mask.astype(float)
+    values = np.where(mask, cells, 0.0)
+
+    # sums over the common challenges of each pair, by matrix products
+    n = present @ present.T
+    sum_x = values @ present.T
+    sum_y = sum_x.T
+    sum_xx = (values**2) @ present.T
+    sum_yy = sum_xx.T
+    sum_xy = values @ values.T
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = sum_xy - sum_x * sum_y / n
+        variance_x = sum_xx - sum_x**2 / n
+        variance_y = sum_yy - sum_y**2 / n
+        correlation = covariance / np.sqrt(variance_x * variance_y)
+
+    correlation[n < 2] = np.nan
+    np.fill_diagonal(correlation, np.nan)
+    return correlation
+
+
+##############################################
+def _get_sign_tests(cells, first, second):
+    """Count, for each pair of a first and second player, the challenges on which
+    the first player scored more and fewer points than the second, with the
+    two-sided sign test p-value"""
+
+    difference = cells[first] - cells[second]
+    better = np.sum(difference > 0, axis=1)
+    worse = np.sum(difference < 0, axis=1)
+
+    decided = better + worse
+    p_values = np.minimum(1.0, 2 * bdtr(np.minimum(better, worse), decided, 0.5))
+    p_values[decided == 0] = 1.0
+
+    return better, worse, p_values
+
+
+##############################################
+def analyze_grades(tournament):
+    """Compute the grade distribution per player, the difficulty per challenge,
+    the agreement between players and the significance of the differences
+    between players adjacent in the ranking"""
+
+    (
+        player_idx,
+        challenge_idx,
+        grade_idx,
+        players,
+        challenges,
+        grade_labels,
+        grade_points,
+    ) = encode_grades(tournament)
+
+    number_players = len(players)
+    number_challenges = len(challenges)
+    points = grade_points[grade_idx] if len(grade_idx) > 0 else np.zeros(0)
+    scored = ~np.isnan(points)
+
+    # grade distribution per player
+    distribution = np.bincount(
+        player_idx * len(grade_labels) + grade_idx,
+        minlength=number_players * len(grade_labels),
+    ).reshape(number_players, len(grade_labels))
+
+    # points per player and per challenge
+    graded, player_means, player_errors = _group_means(
+        player_idx[scored], points[scored], number_players
+    )
+    challenge_counts, challenge_means, _challenge_errors = _group_means(
+        challenge_idx[scored], points[scored], number_challenges
+    )
+
+    # mean points of each player on each challenge
+    _cell_counts, cells, _cell_errors = _group_means(
+        player_idx[scored] * number_challenges + challenge_idx[scored],
+        points[scored],
+        number_players * number_challenges,
+    )
+    cells = cells.reshape(number_players, number_challenges)
+
+    # rank players by mean points, and test each against the next in the ranking
+    ranking = np.argsort(-np.nan_to_num(player_means, nan=-1.0), kind="stable")
+    better, worse, p_values = _get_sign_tests(cells, ranking[:-1], ranking[1:])
+
+    return {
+        "players": players,
+        "challenges": challenges,
+        "grade_labels": grade_labels,
+        "distribution": distribution,
+        "graded": graded,
+        "player_means": player_means,
+        "player_errors": player_errors,
+        "challenge_counts": challenge_counts,
+        "challenge_means": challenge_means,
+        "agreement": _get_agreement(cells),
+        "ranking": ranking,
+        "better": better,
+        "worse": worse,
+        "p_values": p_values,
+    }
+
+
+##############################################
+def generate_grade_analysis(tournament):
+    """Generate a markdown analysis of the grades of a tournament"""
+
+    stats = analyze_grades(tournament)
+    players = stats["players"]
+    ranking = stats["ranking"]
+
+    analysis = f"\n## {tournament['meta']['competition']['name'].capitalize()} / {tournament['meta']['tournament'].capitalize()} / {tournament['meta']['player_set']}\n"
+    analysis += f"{len(players)} players, {len(tournament['challenges'])} challenges, "
+    analysis += f"{len(tournament['grades'])} grades on {len(stats['challenges'])} challenges\n"
+    with np.errstate(invalid="ignore"):
+        mean_agreement = np.nanmean(stats["agreement"]) if len(players) > 1 else np.nan
+    analysis += f"\nMean agreement of players on challenge difficulty (correlation) {mean_agreement:.2f}\n"
+
+    # per player distribution
+    grade_labels = stats["grade_labels"]
+    analysis += f"\n| Player | Grades | Points | {' | '.join(grade_labels)} | Agreement |"
+    analysis += f"\n|---|---|---|{'---|' * len(grade_labels)}---|\n"
+    for i in ranking:
+        graded = stats["distribution"][i].sum()
+        shares = "|".join(
+            f"{count / graded:.0%}" if graded > 0 else "-"
+            for count in stats["distribution"][i]
+        )
+        with np.errstate(invalid="ignore"):
+            agreement = (
+                np.nanmean(stats["agreement"][i]) if len(players) > 1 else np.nan
+            )
+        analysis += f"**{players[i]}**|{graded}|**{stats['player_means'][i]:.2f}** +/- {stats['player_errors'][i]:.2f}|{shares}|{agreement:.2f}|\n"
+
+    # significance of the differences between players adjacent in the ranking
+    analysis += "\n### Significance\nSign test over the challenges both players were graded on\n"
+    analysis += "\n| Player | Next Player | Better | Worse | p |\n|---|---|---|---|---|\n"
+    for k, (i, j) in enumerate(zip(ranking, ranking[1:])):
+        p_value = stats["p_values"][k]
+        marker = "**" if p_value < SIGNIFICANCE_LEVEL else ""
+        analysis += f"**{players[i]}**|{players[j]}|{stats['better'][k]}|{stats['worse'][k]}|{marker}{p_value:.3f}{marker}|\n"
+
+    # hardest challenges
+    analysis += f"\n### Hardest Challenges\n"
+    analysis += "\n| Challenge | Grades | Points |\n|---|---|---|\n"
+    hardest = np.argsort(np.nan_to_num(stats["challenge_means"], nan=np.inf))
+    for c in hardest[:HARDEST_CHALLENGES]:
+        analysis += f"**{stats['challenges'][c]}**|{stats['challenge_counts'][c]}|{stats['challenge_means'][c]:.2f}|\n"
+
+    return analysis
@@ -0,0 +1,239 @@
+import os
+import json
+import warnings
+import concurrent.futures
+from src.storage.content import content_hash
+from src.storage.files import write_file
+from src.competition.leaderboard import get_score_history
+from analyze.elo import calculate_winning_likelihoods
+
+# The file in each output directory recording the inputs of the rendered charts
+CHARTS_MANIFEST = "charts.manifest.json"
+
+
+##############################################
+def _import_plotting():
+    """Import the plotting libraries on first use, with a non-interactive backend."""
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    warnings.simplefilter(action="ignore", category=FutureWarning)
+
+    return plt, pd, sns
+
+
+##############################################
+def _plot_history(history, title, columns, axis_label, axis_min, axis_max, output_file):
+    """Plot the history of all players, given as match numbers and values per player."""
+
+    plt, pd, sns = _import_plotting()
+
+    # align the series on their match numbers, padding with NaN values
+    df = pd.DataFrame(
+        {
+            label: pd.Series(values, index=matches)
+            for label, (matches, values) in history.items()
+        }
+    )
+
+    # set up the figure and axes
+    _fig, ax = plt.subplots(figsize=(12, 8))
+
+    # plot using Seaborn with explicit line styles
+    for column in columns:
+        sns.lineplot(data=df[column], ax=ax, label=column, linestyle="-", errorbar=None)
+
+    # adjust the plot area to make room for the legend
+    plt.subplots_adjust(right=0.8)
+
+    # customize the chart
+    ax.set_xlabel("Match")
+    ax.set_ylabel(axis_label)
+    ax.set_title(title)
+    ax.set_ylim(axis_min, axis_max)
+    ax.legend(df.columns, bbox_to_anchor=(1.01, 1.01), loc="upper left")
+
+    # Save the chart as a PNG file
+    plt.savefig(output_file)
+    plt.close()
+
+
+##############################################
+def _plot_matrix(matrix, labels, fstring, output_file):
+    """Plot a matrix of scores."""
+
+    plt, _pd, sns = _import_plotting()
+
+    plt.figure(figsize=(10, 8))
+
+    # Create a heatmap using Seaborn
+    ax = sns.heatmap(
+        matrix,
+        annot=False,
+        cmap="coolwarm",
+        fmt=".2f",
+        square=True,
+        xticklabels=labels,
+        yticklabels=labels,
+    )
+
+    # Add text annotations to the heatmap
+    for i in range(len(labels)):
+        for j in range(len(labels)):
+            if i != j:
+                ax.text(
+                    j + 0.5,
+                    i + 0.5,
+                    fstring.format(value=matrix[i, j]),
+                    ha="center",
+                    va="center",
+                )
+
+    # Customize the plot
+    plt.title("Score Matrix")
+    plt.xticks(rotation=90, fontsize=7)
+    plt.yticks(rotation=0, fontsize=7)
+
+    # Save the chart as a PNG file
+    plt.savefig(output_file)
+    plt.close()
+
+
+##############################################
+def get_matches_fingerprint(players, matches):
+    """Fingerprint the players and match results a tournament's charts are drawn from."""
+    return content_hash(
+        [
+            list(players),
+            sorted(
+                [match_name, match["result"]["winner"]]
+                for match_name, match in matches.items()
+            ),
+        ]
+    )
+
+
+##############################################
+def get_score_history_charts(leaderboard, output_file, fingerprint):
+    """Get the chart of the score history of all players."""
+
+    history = {
+        player: get_score_history(player_stats)
+        for player, player_stats in leaderboard.items()
+    }
+
+    return [
+        {
+            "function": _plot_history,
+            "args": (
+                history,
+                "Score evolution",
+                list(leaderboard.keys()),
+                "ELO",
+                0,
+                1,
+                output_file,
+            ),
+            "output_file": output_file,
+            "fingerprint": fingerprint,
+        }
+    ]
+
+
+##############################################
+def get_score_matrix_charts(
+    players, matches, games_output_file, scores_output_file, fingerprint
+):
+    """Get the charts of the match counts and score stats of each player pair."""
+
+    # Create a matrix of scores
+    labels = list(players)
+    matrix, match_count = calculate_winning_likelihoods(labels, matches)
+
+    return [
+        {
+            "function": _plot_matrix,
+            "args": (match_count, labels, "{value:.0f}", games_output_file),
+            "output_file": games_output_file,
+            "fingerprint": fingerprint,
+        },
+        {
+            "function": _plot_matrix,
+            "args": (matrix, labels, "{value:.2f}", scores_output_file),
+            "output_file": scores_output_file,
+            "fingerprint": fingerprint,
+        },
+    ]
+
+
+##############################################
+def _read_manifest(path):
+    """Read the fingerprints of the charts rendered into a directory."""
+
+    manifest_filename = f"{path}/{CHARTS_MANIFEST}"
+    if not os.path.exists(manifest_filename):
+        return {}
+
+    try:
+        with open(manifest_filename, "r") as file:
+            return json.load(file)
+    except ValueError:
+        print(f"      WARNING: ignoring corrupt manifest {manifest_filename}")
+        return {}
+
+
+##############################################
+def _render_chart(function, args):
+    """Render a chart, in a worker process."""
+    function(*args)
+
+
+##############################################
+def render_charts(charts, skip_unchanged=False, max_workers=None):
+    """Render charts in a process pool, optionally skipping the charts whose
+    file exists and whose inputs are unchanged since they were last rendered."""
+
+    # group by output directory, where the fingerprints are recorded
+    manifests = {}
+    for chart in charts:
+        path = os.path.dirname(chart["output_file"])
+        if path not in manifests:
+            manifests[path] = _read_manifest(path)
+
+    def is_unchanged(chart):
+        path, filename = os.path.split(chart["output_file"])
+        return (
+            os.path.exists(chart["output_file"])
+            and manifests[path].get(filename) == chart["fingerprint"]
+        )
+
+    charts = [chart for chart in charts if not (skip_unchanged and is_unchanged(chart))]
+    if len(charts) == 0:
+        return
+
+    max_workers = min(len(charts), max_workers or os.cpu_count())
+    if max_workers < 2:
+        for chart in charts:
+            _render_chart(chart["function"], chart["args"])
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(
+                executor.map(
+                    _render_chart,
+                    [chart["function"] for chart in charts],
+                    [chart["args"] for chart in charts],
+                )
+            )
+
+    # record the inputs of the rendered charts
+    for chart in charts:
+        path, filename = os.path.split(chart["output_file"])
+        manifests[path][filename] = chart["fingerprint"]
+    for path, manifest in manifests.items():
+        write_file(f"{path}/{CHARTS_MANIFEST}", json.dumps(manifest))
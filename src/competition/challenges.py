@@ -0,0 +1,138 @@
+import os
+import json
+import threading
+import collections
+from collections.abc import Mapping
+from src.competition.fingerprint import get_challenge_fingerprint
+from src.storage.files import read_json, read_yaml, read_in_parallel, write_file
+
+
+# The number of challenge bodies kept in memory
+CHALLENGE_CACHE_SIZE = 256
+
+# The supported challenge file formats
+CHALLENGE_FORMATS = (".json", ".yaml")
+
+
+##############################################
+def _read_challenge(challenge_filename):
+    """Read the content of a challenge file"""
+
+    if challenge_filename.endswith(".json"):
+        return read_json(challenge_filename)
+
+    # challenges are cached by the challenge store, which bounds their number
+    return read_yaml(challenge_filename, cached=False)
+
+
+##############################################
+def _fingerprint_challenge(challenge_filename):
+    """Fingerprint the content of a challenge file"""
+    return get_challenge_fingerprint(_read_challenge(challenge_filename))
+
+
+##############################################
+class ChallengeStore(Mapping):
+    """The challenges of a competition, sorted by name.
+
+    Names, modification times and fingerprints are indexed up front; the
+    challenge content is only read when a challenge is accessed, and the
+    most recently used challenges are kept in memory."""
+
+    def __init__(self, competition, cache_size=CHALLENGE_CACHE_SIZE):
+        self.competition = competition
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._index = self._build_index()
+
+    def _build_index(self):
+        """Index all challenge files, fingerprinting only new or changed ones"""
+
+        challenge_dir = f"competitions/{self.competition}/challenges"
+        manifest_filename = f"competitions/{self.competition}/challenges.manifest.json"
+
+        manifest = {}
+        if os.path.exists(manifest_filename):
+            try:
+                manifest = read_json(manifest_filename)
+            except ValueError:
+                print(f"      WARNING: ignoring corrupt manifest {manifest_filename}")
+
+        stats = {}
+        if os.path.isdir(challenge_dir):
+            with os.scandir(challenge_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(CHALLENGE_FORMATS):
+                        print(
+                            f"      WARNING: challenge {os.path.splitext(entry.name)[0]} has unknown format"
+                        )
+                        continue
+                    stats[entry.name] = entry.stat()
+
+        # fingerprint new or changed challenges in parallel
+        changed = [
+            name
+            for name, stat in stats.items()
+            if name not in manifest
+            or manifest[name]["mtime"] != stat.st_mtime
+            or manifest[name]["size"] != stat.st_size
+        ]
+        updated_manifest = {name: manifest[name] for name in stats if name not in changed}
+        for name, fingerprint in zip(
+            changed,
+            read_in_parallel(
+                _fingerprint_challenge, [f"{challenge_dir}/{name}" for name in changed]
+            ),
+        ):
+            updated_manifest[name] = {
+                "mtime": stats[name].st_mtime,
+                "size": stats[name].st_size,
+                "fingerprint": fingerprint,
+            }
+
+        if len(changed) > 0 or len(updated_manifest) != len(manifest):
+            write_file(manifest_filename, json.dumps(updated_manifest))
+
+        # index by challenge name, sorted ascending
+        index = {}
+        for filename in sorted(updated_manifest):
+            challenge_name = os.path.splitext(filename)[0]
+            index[challenge_name] = {
+                "name": challenge_name,
+                "filename": f"{challenge_dir}/{filename}",
+                "updated": updated_manifest[filename]["mtime"],
+                "fingerprint": updated_manifest[filename]["fingerprint"],
+            }
+
+        return dict(sorted(index.items(), key=lambda x: x[0]))
+
+    def info(self, challenge_name):
+        """Get name, filename, modification time and fingerprint of a challenge without reading it"""
+        return self._index[challenge_name]
+
+    def __getitem__(self, challenge_name):
+        with self._lock:
+            if challenge_name in self._cache:
+                self._cache.move_to_end(challenge_name)
+                return self._cache[challenge_name]
+
+        info = self._index[challenge_name]
+        challenge = _read_challenge(info["filename"])
+        challenge["name"] = challenge_name
+
+        with self._lock:
+            self._cache[challenge_name] = challenge
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return challenge
+
+    def __contains__(self, challenge_name):
+        return challenge_name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
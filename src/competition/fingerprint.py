@@ -0,0 +1,66 @@
+from src.storage.content import content_hash
+
+
+# The player settings that determine a performance
+PLAYER_FIELDS = ("model", "temperature", "system", "prompt")
+
+# The evaluation settings that determine a match or grade
+EVALUATION_FIELDS = ("model", "temperature", "system", "prompt", "objective", "criteria")
+
+
+##############################################
+def get_player_fingerprint(player):
+    """Fingerprint the settings of a player"""
+    return content_hash({field: player.get(field, "") for field in PLAYER_FIELDS})
+
+
+##############################################
+def get_challenge_fingerprint(challenge):
+    """Fingerprint the content of a challenge, as read from its file"""
+    return content_hash(challenge)
+
+
+##############################################
+def get_evaluation_fingerprint(evaluation):
+    """Fingerprint the settings of a comparison or grading evaluation"""
+    return content_hash(
+        {field: evaluation.get(field, "") for field in EVALUATION_FIELDS}
+    )
+
+
+##############################################
+def get_performance_fingerprint(challenge, player):
+    """Fingerprint the inputs of a player's performance on a challenge,
+    given the challenge or its index entry"""
+    return content_hash([challenge["fingerprint"], player["fingerprint"]])
+
+
+##############################################
+def get_match_fingerprint(tournament, challenge_name, player_A_name, player_B_name):
+    """Fingerprint the inputs of a match"""
+
+    challenge = tournament["challenges"].info(challenge_name)
+    return content_hash(
+        [
+            get_performance_fingerprint(
+                challenge, tournament["players"][player_A_name]
+            ),
+            get_performance_fingerprint(
+                challenge, tournament["players"][player_B_name]
+            ),
+            get_evaluation_fingerprint(tournament["comparison"]),
+        ]
+    )
+
+
+##############################################
+def get_grade_fingerprint(tournament, challenge_name, player_name):
+    """Fingerprint the inputs of a grade"""
+
+    challenge = tournament["challenges"].info(challenge_name)
+    return content_hash(
+        [
+            get_performance_fingerprint(challenge, tournament["players"][player_name]),
+            get_evaluation_fingerprint(tournament["grading"]),
+        ]
+    )
@@ -1,57 +1,243 @@
-import json
-import random
+import math
+import time
+import collections
+from array import array
 import numpy as np
+from src.competition.rating import get_initial_rating, update_ratings
+from src.storage.files import write_json
+
+# The minimum number of seconds between two leaderboard writes during play
+LEADERBOARD_FLUSH_INTERVAL = 10.0
+
+# The maximum number of score history points kept per player; longer histories
+# are thinned out to every other point
+SCORE_HISTORY_MAX_LENGTH = 1024
+
+# The leaderboard fields only kept in memory, not persisted
+TRANSIENT_FIELDS = ("score_history", "score_history_stride")
+
+
+##############################################
+def _get_match_points(match):
+    """Get the points of player A in a match: 1 for a win, 0.5 for a draw, 0 for a loss"""
+
+    winner_name = match["result"]["winner"]
+    if winner_name == match["player_A"]["name"]:
+        return 1.0
+    if winner_name == match["player_B"]["name"]:
+        return 0.0
+    return 0.5
 
 
 ##############################################
-def generate_leaderboard(tournament):
-    """Generate the current leaderboard from the match history"""
+def _get_score_histories(player_indices, points, number_players):
+    """Get the score of every player before each of their matches, given the
+    player indices and points of all match participations in playing order"""
+
+    # group the participations by player, keeping their order
+    order = np.argsort(player_indices, kind="stable")
+    sorted_points = points[order]
+    counts = np.bincount(player_indices, minlength=number_players)
+    starts = np.cumsum(counts) - counts
+
+    # points and matches of each player before each participation
+    cumulative_points = np.concatenate([[0.0], np.cumsum(sorted_points)])
+    points_before = cumulative_points[:-1] - np.repeat(cumulative_points[starts], counts)
+    matches_before = np.arange(len(sorted_points)) - np.repeat(starts, counts)
+
+    scores = np.divide(
+        points_before,
+        matches_before,
+        out=np.full(len(sorted_points), 0.5),
+        where=matches_before > 0,
+    ).astype(np.float32)
+
+    return [scores[start : start + count] for start, count in zip(starts, counts)]
+
+
+##############################################
+def generate_leaderboard(tournament, flush=True):
+    """Generate the current leaderboard from the match history and grades,
+    saving it unless flush is False"""
+
+    players = list(tournament["players"])
+    player_index = {player: i for i, player in enumerate(players)}
+
+    # encode the matches played, in the order they were stored, as player indices
+    # and points of player A; ratings depend on this order
+    match_times = tournament["match_times"]
+    matches = [
+        tournament["matches"][match_name]
+        for match_name in sorted(
+            tournament["matches"],
+            key=lambda match_name: (match_times.get(match_name, 0.0), match_name),
+        )
+        if tournament["matches"][match_name]["result"]["winner"] != "DNP"
+    ]
+    player_A = np.array(
+        [player_index[match["player_A"]["name"]] for match in matches], dtype=np.intp
+    )
+    player_B = np.array(
+        [player_index[match["player_B"]["name"]] for match in matches], dtype=np.intp
+    )
+    points_A = np.array([_get_match_points(match) for match in matches], dtype=float)
+
+    # count outcomes per player
+    def count(player_indices, selection):
+        return np.bincount(player_indices[selection], minlength=len(players))
+
+    wins = count(player_A, points_A == 1.0) + count(player_B, points_A == 0.0)
+    losses = count(player_A, points_A == 0.0) + count(player_B, points_A == 1.0)
+    draws = count(player_A, points_A == 0.5) + count(player_B, points_A == 0.5)
+    played = wins + losses + draws
+
+    # score before each match, interleaving the participations of A and B
+    score_histories = _get_score_histories(
+        np.column_stack([player_A, player_B]).ravel(),
+        np.column_stack([points_A, 1.0 - points_A]).ravel(),
+        len(players),
+    )
 
     tournament["leaderboard"] = {}
+    for i, player in enumerate(players):
+        # thin out long histories as the incremental update does
+        stride = 1
+        while math.ceil(played[i] / stride) > SCORE_HISTORY_MAX_LENGTH:
+            stride *= 2
 
-    for player in tournament["players"]:
-        # set up initial leaderboard entry for new player
         tournament["leaderboard"][player] = {
-            "score": 0.5,
-            "score_history": [],
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "matches": 0,
+            "score": (wins[i] + 0.5 * draws[i]) / played[i] if played[i] > 0 else 0.5,
+            "score_history": array(
+                "f", score_histories[i][::stride].astype(np.float32).tobytes()
+            ),
+            "score_history_stride": stride,
+            "wins": int(wins[i]),
+            "losses": int(losses[i]),
+            "draws": int(draws[i]),
+            "matches": int(played[i]),
             "grades": {},
+            **get_initial_rating(),
         }
 
-    # re-play match history
-    matches = list(tournament["matches"].values())
-    random.shuffle(matches)
-    for match in matches:
-        update_leaderboard_with_match(tournament, match, False)
+    # ratings depend on the order of matches, so they are replayed
+    for A, B, points in zip(player_A, player_B, points_A):
+        update_ratings(
+            tournament["leaderboard"][players[A]],
+            tournament["leaderboard"][players[B]],
+            points,
+        )
 
     # aggregate grades
-    for grade in tournament["grades"]:
-        update_leaderboard_with_grade(tournament, grade, False)
+    grade_counts = collections.Counter(
+        (grade["player"]["name"], grade["grade"])
+        for grade in tournament["grades"].values()
+    )
+    for (player, grading), number in grade_counts.items():
+        tournament["leaderboard"][player]["grades"][grading] = number
 
     # now save
-    save_leaderboard(tournament)
+    if flush:
+        flush_leaderboard(tournament)
+
+
+##############################################
+def get_sorted_leaderboard(tournament):
+    """Get the leaderboard sorted by descending score"""
+
+    return dict(
+        sorted(
+            tournament["leaderboard"].items(),
+            key=lambda x: x[1]["score"],
+            reverse=True,
+        )
+    )
+
+
+##############################################
+def get_leaderboard_stats(tournament):
+    """Get median, average and standard deviation of the players' scores"""
+
+    scores = [
+        player_stats["score"] for player_stats in tournament["leaderboard"].values()
+    ]
+
+    return {
+        "median": np.median(scores),
+        "average": np.mean(scores),
+        "stddev": np.std(scores),
+    }
 
 
 ##############################################
-def save_leaderboard(tournament):
-    """Persist the updated matches and the leaderboard"""
+def flush_leaderboard(tournament):
+    """Persist the leaderboard atomically"""
 
     competition = tournament["meta"]["competition"]["name"]
     tournament_name = tournament["meta"]["tournament"]
+    leaderboard_stem = (
+        f"competitions/{competition}/tournaments/{tournament_name}/leaderboard"
+    )
 
-    # write the leaderboard ordered by descending elo
-    with open(
-        f"competitions/{competition}/tournaments/{tournament_name}/leaderboard.json",
-        "w",
-    ) as file:
-        json.dump(
-            tournament["leaderboard"],
-            file,
-            indent=2,
-        )
+    # write the leaderboard ordered by descending score, without the score history
+    leaderboard = {
+        player: {
+            key: value
+            for key, value in player_stats.items()
+            if key not in TRANSIENT_FIELDS
+        }
+        for player, player_stats in get_sorted_leaderboard(tournament).items()
+    }
+    write_json(leaderboard_stem, leaderboard, indent=2)
+
+    tournament["meta"]["leaderboard_dirty"] = False
+    tournament["meta"]["leaderboard_flushed"] = time.monotonic()
+
+
+##############################################
+def save_leaderboard(tournament, force=False):
+    """Persist the leaderboard, at most once per flush interval unless forced"""
+
+    tournament["meta"]["leaderboard_dirty"] = True
+
+    if (
+        force
+        or time.monotonic() - tournament["meta"].get("leaderboard_flushed", 0)
+        >= LEADERBOARD_FLUSH_INTERVAL
+    ):
+        flush_leaderboard(tournament)
+
+
+##############################################
+def finish_leaderboard(tournament):
+    """Persist pending leaderboard updates, e.g. at the end of a batch"""
+
+    if tournament["meta"].get("leaderboard_dirty", False):
+        flush_leaderboard(tournament)
+
+
+##############################################
+def _append_score_history(player_stats):
+    """Record the score before the latest match, keeping every stride-th point only"""
+
+    stride = player_stats["score_history_stride"]
+    if (player_stats["matches"] - 1) % stride != 0:
+        return
+
+    history = player_stats["score_history"]
+    history.append(player_stats["score"])
+
+    # halve the resolution of long histories; point i is the score before match i * stride
+    if len(history) > SCORE_HISTORY_MAX_LENGTH:
+        player_stats["score_history"] = history[::2]
+        player_stats["score_history_stride"] = 2 * stride
+
+
+##############################################
+def get_score_history(player_stats):
+    """Get the match numbers and scores of a player's score history"""
+
+    history = np.asarray(player_stats["score_history"], dtype=float)
+    return np.arange(len(history)) * player_stats["score_history_stride"], history
 
 
 ##############################################
@@ -77,45 +263,30 @@ def update_leaderboard_with_match(tournament, match, save=True):
     if winner_name == player_A_name:
         player_A_stats["wins"] += 1
         player_B_stats["losses"] += 1
+        score_A = 1.0
     elif winner_name == player_B_name:
         player_A_stats["losses"] += 1
         player_B_stats["wins"] += 1
+        score_A = 0.0
     else:
         player_A_stats["draws"] += 1
         player_B_stats["draws"] += 1
+        score_A = 0.5
+
+    # update rating and its uncertainty
+    update_ratings(player_A_stats, player_B_stats, score_A)
 
     # update score
-    player_A_stats["score_history"].append(player_A_stats["score"])
+    _append_score_history(player_A_stats)
     player_A_stats["score"] = (
         1.0 * player_A_stats["wins"] + 0.5 * player_A_stats["draws"]
     ) / player_A_stats["matches"]
-    player_B_stats["score_history"].append(player_B_stats["score"])
+    _append_score_history(player_B_stats)
     player_B_stats["score"] = (
         1.0 * player_B_stats["wins"] + 0.5 * player_B_stats["draws"]
     ) / player_B_stats["matches"]
 
-    # re-sort the leaderboard by score desc
-    tournament["leaderboard"] = dict(
-        sorted(
-            tournament["leaderboard"].items(),
-            key=lambda x: x[1]["score"],
-            reverse=True,
-        )
-    )
-
-    # calc aggregate stats
-    scores = [
-        tournament["leaderboard"][player_name]["score"]
-        for player_name in tournament["leaderboard"]
-    ]
-
-    tournament["stats"] = {
-        "median": np.median(scores),
-        "average": np.mean(scores),
-        "stddev": np.std(scores),
-    }
-
-    # store leaderboard
+    # store leaderboard; sorting and aggregate stats are computed on read
     if save:
         save_leaderboard(tournament)
 
@@ -1,8 +1,21 @@
 import os
-import json
 import glob
-import yaml
 from src.competition.leaderboard import generate_leaderboard
+from src.storage import load_records, delete_record, migrate_records
+from src.storage.files import (
+    read_json,
+    read_yaml,
+    read_in_parallel,
+    split_json_filename,
+    convert_json,
+)
+from src.competition.challenges import ChallengeStore
+from src.competition.fingerprint import (
+    get_player_fingerprint,
+    get_performance_fingerprint,
+    get_match_fingerprint,
+    get_grade_fingerprint,
+)
 from src.play.perform import unescape_player_name
 
 
@@ -25,75 +38,67 @@ def resolve_tournaments(competition, tournament=""):
 
 
 ##############################################
-def load_matches(competition, tournament_state, discard_outdated=True):
-    """Load the competition into a structure representing its state"""
+def _report_outdated(state, kind, name, dry_run):
+    """Report an outdated result and count it by kind"""
 
-    tournament = tournament_state["meta"]["tournament"]
+    discarded = state["meta"].setdefault("discarded", {})
+    discarded[kind] = discarded.get(kind, 0) + 1
 
-    # load the matches
-    tournament_state["matches"] = {}
-    for match_filename in glob.glob(
-        f"competitions/{competition}/tournaments/{tournament}/matches/*.json"
-    ):
-        with open(match_filename, "r") as file:
-            match_time = os.path.getmtime(match_filename)
-            match_name = get_name_from_path(match_filename)
-            match = json.load(file)
+    if dry_run:
+        print(f"      would discard outdated {kind} {name}")
+    else:
+        print(f"      discarding outdated {kind} {name}")
 
-            # skip if either player is not in the active set
-            if (
-                match["player_A"]["name"] not in tournament_state["players"]
-                or match["player_B"]["name"] not in tournament_state["players"]
-            ):
-                continue
 
-            # ok, use this match
-            tournament_state["matches"][match_name] = match
+##############################################
+def load_matches(competition, tournament_state, discard_outdated=True, dry_run=False):
+    """Load the competition into a structure representing its state"""
+
+    # load the matches
+    tournament_state["matches"] = {}
+    tournament_state["match_times"] = {}
+    for match_name, match, match_time in load_records(tournament_state, "matches"):
+        # skip if either player is not in the active set
+        if (
+            match["player_A"]["name"] not in tournament_state["players"]
+            or match["player_B"]["name"] not in tournament_state["players"]
+        ):
+            continue
 
-            # if this match is older than challenge or players or eval, discard it
+        # ok, use this match
+        tournament_state["matches"][match_name] = match
+        tournament_state["match_times"][match_name] = match_time
+
+        # if this match was played on other challenge or players or eval, discard it
+        if "fingerprint" in match and tournament_state["comparison"] is not None:
+            outdated = match["fingerprint"] != get_match_fingerprint(
+                tournament_state,
+                match["challenge"],
+                match["player_A"]["name"],
+                match["player_B"]["name"],
+            )
+        else:
+            # matches of older versions have no fingerprint, so compare timestamps
             player_A_time = tournament_state["players"][
                 tournament_state["matches"][match_name]["player_A"]["name"]
             ]["updated"]
             player_B_time = tournament_state["players"][
                 tournament_state["matches"][match_name]["player_B"]["name"]
             ]["updated"]
-            challenge_time = tournament_state["challenges"][
+            challenge_time = tournament_state["challenges"].info(
                 tournament_state["matches"][match_name]["challenge"]
-            ]["updated"]
+            )["updated"]
+            outdated = match_time < max(player_A_time, player_B_time, challenge_time)
 
-            if discard_outdated and match_time < max(
-                player_A_time, player_B_time, challenge_time
-            ):
-                print(f"      discarding outdated match {match_name}")
-                del tournament_state["matches"][match_name]
-                os.remove(match_filename)
+        if discard_outdated and outdated:
+            _report_outdated(tournament_state, "match", match_name, dry_run)
+            del tournament_state["matches"][match_name]
+            del tournament_state["match_times"][match_name]
+            if not dry_run:
+                delete_record(tournament_state, "matches", match_name)
 
     print(f"    loaded {len(tournament_state['matches'])} previous matches")
 
-    # clean up performances that are older than the respective player or challenge
-    for performance_filename in glob.glob(
-        f"competitions/{competition}/performances/*.json"
-    ):
-        performance_time = os.path.getmtime(performance_filename)
-        performance_name = get_name_from_path(performance_filename)
-        player_name = performance_name.split(":")[1]
-        challenge_name = performance_name.split(":")[0]
-
-        # skip players not in this set
-        if player_name not in tournament_state["players"]:
-            continue
-
-        player_time = tournament_state["players"][player_name]["updated"]
-        challenge_time = tournament_state["challenges"][challenge_name]["updated"]
-
-        if discard_outdated and performance_time < max(player_time, challenge_time):
-            print(f"      discarding outdated performance {performance_name}")
-            os.remove(performance_filename)
-
-    # generate the leaderboard
-    generate_leaderboard(tournament_state)
-    print(f"    generated leaderboard")
-
     # calc number of matches
     tournament_state["meta"]["pairings"] = int(
         (len(tournament_state["players"]) * (len(tournament_state["players"]) - 1))
@@ -106,63 +111,42 @@ def load_matches(competition, tournament_state, discard_outdated=True):
 
 
 ##############################################
-def load_grades(competition, tournament_state, discard_outdated=True):
+def load_grades(competition, tournament_state, discard_outdated=True, dry_run=False):
     """Load the gradings into a competition state"""
 
-    tournament = tournament_state["meta"]["tournament"]
-
     # load the grades
     tournament_state["grades"] = {}
-    for grade_filename in glob.glob(
-        f"competitions/{competition}/tournaments/{tournament}/grades/*.json"
-    ):
-        with open(grade_filename, "r") as file:
-            grade_time = os.path.getmtime(grade_filename)
-            grade_name = get_name_from_path(grade_filename)
-            grade = json.load(file)
-
-            # skip if player is not in the active set
-            if grade["player"]["name"] not in tournament_state["players"]:
-                continue
+    for grade_name, grade, grade_time in load_records(tournament_state, "grades"):
+        # skip if player is not in the active set
+        if grade["player"]["name"] not in tournament_state["players"]:
+            continue
 
-            # ok, use this grade
-            tournament_state["grades"][grade_name] = grade
+        # ok, use this grade
+        tournament_state["grades"][grade_name] = grade
 
-            # if this match is older than challenge or player or eval, discard it
+        # if this grade was given on other challenge or player or eval, discard it
+        if "fingerprint" in grade and tournament_state["grading"] is not None:
+            outdated = grade["fingerprint"] != get_grade_fingerprint(
+                tournament_state, grade["challenge"], grade["player"]["name"]
+            )
+        else:
+            # grades of older versions have no fingerprint, so compare timestamps
             player_time = tournament_state["players"][
                 tournament_state["grades"][grade_name]["player"]["name"]
             ]["updated"]
-            challenge_time = tournament_state["challenges"][
+            challenge_time = tournament_state["challenges"].info(
                 tournament_state["grades"][grade_name]["challenge"]
-            ]["updated"]
+            )["updated"]
+            outdated = grade_time < max(player_time, challenge_time)
 
-            if discard_outdated and grade_time < max(player_time, challenge_time):
-                print(f"      discarding outdated grade {grade_name}")
-                del tournament_state["grades"][grade_name]
-                os.remove(grade_filename)
+        if discard_outdated and outdated:
+            _report_outdated(tournament_state, "grade", grade_name, dry_run)
+            del tournament_state["grades"][grade_name]
+            if not dry_run:
+                delete_record(tournament_state, "grades", grade_name)
 
     print(f"    loaded {len(tournament_state['grades'])} previous grades")
 
-    # clean up performances that are older than the respective player or challenge
-    for performance_filename in glob.glob(
-        f"competitions/{competition}/performances/*.json"
-    ):
-        performance_time = os.path.getmtime(performance_filename)
-        performance_name = get_name_from_path(performance_filename)
-        player_name = unescape_player_name(performance_name.split(":")[1])
-        challenge_name = performance_name.split(":")[0]
-
-        # skip players not in this set
-        if player_name not in tournament_state["players"]:
-            continue
-
-        player_time = tournament_state["players"][player_name]["updated"]
-        challenge_time = tournament_state["challenges"][challenge_name]["updated"]
-
-        if discard_outdated and performance_time < max(player_time, challenge_time):
-            print(f"      discarding outdated performance {performance_name}")
-            os.remove(performance_filename)
-
 
 ##############################################
 def load_players(competition, tournament_state, player_set):
@@ -207,49 +191,89 @@ def load_players(competition, tournament_state, player_set):
         if not played_is_in:
             continue
 
-        with open(player_filename, "r") as file:
-            player = yaml.safe_load(file)
-            player_name = player.get("name", get_name_from_path(player_filename))
+        player = read_yaml(player_filename)
+        player_name = player.get("name", get_name_from_path(player_filename))
 
-            if player_name in tournament_state["players"]:
-                print(
-                    f"      WARNING: player {player_name} already exists, overwriting"
-                )
+        if player_name in tournament_state["players"]:
+            print(
+                f"      WARNING: player {player_name} already exists, overwriting"
+            )
 
-            tournament_state["players"][player_name] = player
-            tournament_state["players"][player_name]["name"] = player_name
-            tournament_state["players"][player_name]["updated"] = os.path.getmtime(player_filename)
-            tournament_state["players"][player_name]["performances"] = []
+        tournament_state["players"][player_name] = player
+        tournament_state["players"][player_name]["name"] = player_name
+        tournament_state["players"][player_name]["updated"] = os.path.getmtime(player_filename)
+        tournament_state["players"][player_name]["fingerprint"] = get_player_fingerprint(player)
+        tournament_state["players"][player_name]["performances"] = []
 
     print(f"    loaded {len(tournament_state['players'])} players")
 
 
 ##############################################
 def load_challenges(competition, tournament_state):
-    for challenge_filename in glob.glob(f"competitions/{competition}/challenges/*"):
-        with open(challenge_filename, "r") as file:
-            challenge_name = get_name_from_path(challenge_filename)
-            if challenge_filename.endswith(".json"):
-                tournament_state["challenges"][challenge_name] = json.load(file)
-            elif challenge_filename.endswith(".yaml"):
-                tournament_state["challenges"][challenge_name] = yaml.safe_load(file)
-            else:
-                print(f"      WARNING: challenge {challenge_name} has unknown format") 
-                continue                
-
-            tournament_state["challenges"][challenge_name]["name"] = challenge_name
-            tournament_state["challenges"][challenge_name]["updated"] = os.path.getmtime(
-                challenge_filename
-            )
+    """Index the challenges of a competition; their content is read on access"""
 
-    # sort challenges by key ascending
-    tournament_state["challenges"] = dict(
-        sorted(tournament_state["challenges"].items(), key=lambda x: x[0])
-    )
+    tournament_state["challenges"] = ChallengeStore(competition)
 
     print(f"    loaded {len(tournament_state['challenges'])} challenges")
 
 
+##############################################
+def load_performances(competition, competition_state, discard_outdated=True, dry_run=False):
+    """Scan the performances once, discarding those performed on other player or challenge settings"""
+
+    competition_state["performances"] = {}
+
+    performance_dir = f"competitions/{competition}/performances"
+    if not os.path.isdir(performance_dir):
+        return
+
+    with os.scandir(performance_dir) as entries:
+        for entry in entries:
+            performance_name, _compression = split_json_filename(entry.name)
+            if performance_name is None:
+                continue
+
+            performance_time = entry.stat().st_mtime
+            player_name = unescape_player_name(performance_name.split(":")[1])
+            challenge_name = performance_name.split(":")[0]
+
+            # skip players not in this set and challenges that no longer exist
+            if (
+                player_name not in competition_state["players"]
+                or challenge_name not in competition_state["challenges"]
+            ):
+                continue
+
+            player = competition_state["players"][player_name]
+            challenge = competition_state["challenges"].info(challenge_name)
+
+            # only performances older than their player or challenge can be outdated;
+            # perform() checks the fingerprint again whenever it reads one
+            outdated = False
+            if performance_time < max(player["updated"], challenge["updated"]):
+                performance = read_json(entry.path)
+
+                if "fingerprint" in performance:
+                    outdated = performance[
+                        "fingerprint"
+                    ] != get_performance_fingerprint(challenge, player)
+                else:
+                    # performances of older versions have no fingerprint
+                    outdated = True
+
+            if discard_outdated and outdated:
+                _report_outdated(
+                    competition_state, "performance", performance_name, dry_run
+                )
+                if not dry_run:
+                    os.remove(entry.path)
+                continue
+
+            competition_state["performances"][performance_name] = performance_time
+
+    print(f"    found {len(competition_state['performances'])} previous performances")
+
+
 ##############################################
 def load_evaluation(competition, tournament, evaluation):
     """Load the comparative evaluation into a competition state"""
@@ -258,26 +282,22 @@ def load_evaluation(competition, tournament, evaluation):
         f"competitions/{competition}/tournaments/{tournament}/{evaluation}.yaml"
     )
     if os.path.exists(eval_filename):
-        with open(eval_filename, "r") as file:
-            return yaml.safe_load(file)
+        return read_yaml(eval_filename)
         
     return None
 
 
 ##############################################
-def load_tournament(competition, tournament, player_set=""):
-    """Load the competition into a structure representing its state"""
+def load_competition(competition, player_set="", dry_run=False):
+    """Load players, challenges and performances shared by all tournaments of a competition"""
 
-    print(f"  loading {tournament.upper()} of competition {competition.upper()}")
+    print(f"  loading competition {competition.upper()}")
 
     state = dict(
-        meta={"tournament": tournament, "stats": {}},
+        meta={},
         players={},
         challenges={},
-        comparison={},
-        grading={},
-        matches=[],
-        grades=[],
+        performances={},
     )
 
     # check if competition exists
@@ -285,15 +305,9 @@ def load_tournament(competition, tournament, player_set=""):
         print(f"Competition {competition} does not exist")
         exit(-1)
 
-    # check if tournament exists
-    if not os.path.exists(f"competitions/{competition}/tournaments/{tournament}"):
-        print(f"Tournament {tournament} does not exist")
-        exit(-1)
-
     # load the competition
     competition_filename = f"competitions/{competition}/competition.yaml"
-    with open(competition_filename, "r") as file:
-        state["meta"]["competition"] = yaml.safe_load(file)
+    state["meta"]["competition"] = read_yaml(competition_filename)
 
     # load the players
     load_players(competition, state, player_set)
@@ -301,28 +315,153 @@ def load_tournament(competition, tournament, player_set=""):
     # load the challenge
     load_challenges(competition, state)
 
-    # load the matches
-    load_matches(competition, state)
+    # clean up the performances
+    load_performances(competition, state, dry_run=dry_run)
 
-    # load the grades
-    load_grades(competition, state)
+    return state
+
+
+##############################################
+def load_tournament(
+    competition, tournament, player_set="", competition_state=None, dry_run=False
+):
+    """Load the competition into a structure representing its state"""
+
+    # load the shared competition state unless given
+    if competition_state is None:
+        competition_state = load_competition(competition, player_set, dry_run)
+
+    print(f"  loading {tournament.upper()} of competition {competition.upper()}")
+
+    state = dict(
+        meta={
+            "tournament": tournament,
+            "stats": {},
+            "competition": competition_state["meta"]["competition"],
+            "player_set": competition_state["meta"]["player_set"],
+        },
+        # each tournament annotates its own copy of the players
+        players={
+            player_name: {**player, "performances": list(player["performances"])}
+            for player_name, player in competition_state["players"].items()
+        },
+        challenges=competition_state["challenges"],
+        performances=competition_state["performances"],
+        comparison={},
+        grading={},
+        matches=[],
+        match_times={},
+        grades=[],
+    )
+
+    # check if tournament exists
+    if not os.path.exists(f"competitions/{competition}/tournaments/{tournament}"):
+        print(f"Tournament {tournament} does not exist")
+        exit(-1)
 
     # load the comparative evaluation
     state["comparison"] = load_evaluation(competition, tournament, "comparison")
 
     # load the grading evaluation
     state["grading"] = load_evaluation(competition, tournament, "grading")
-    
+
+    # load the matches
+    load_matches(competition, state, dry_run=dry_run)
+
+    # load the grades
+    load_grades(competition, state, dry_run=dry_run)
+
+    # generate the leaderboard from both; a dry run does not save it
+    generate_leaderboard(state, flush=not dry_run)
+    print(f"    generated leaderboard")
+
     return state
 
 
 ##############################################
-def load_tournaments(competition, tournament, player_set):
+def load_tournaments(competition, tournament, player_set, dry_run=False):
     """Load all tournaments of a competition"""
+    competition_state = load_competition(competition, player_set, dry_run)
+
     tournaments = {}
     for tournament_name in resolve_tournaments(competition, tournament):
         tournaments[tournament_name] = load_tournament(
-            competition, tournament_name, player_set
+            competition, tournament_name, player_set, competition_state, dry_run
         )
 
     return tournaments
+
+
+##############################################
+def report_outdated(competition, tournament, player_set):
+    """Report the results that would be discarded as outdated, without discarding them"""
+
+    competition_state = load_competition(competition, player_set, dry_run=True)
+    discarded = dict(competition_state["meta"].get("discarded", {}))
+
+    for tournament_name in resolve_tournaments(competition, tournament):
+        tournament_state = load_tournament(
+            competition, tournament_name, player_set, competition_state, dry_run=True
+        )
+        for kind, count in tournament_state["meta"].get("discarded", {}).items():
+            discarded[kind] = discarded.get(kind, 0) + count
+
+    if len(discarded) == 0:
+        print("No outdated results.")
+    else:
+        print(
+            "Would discard "
+            + ", ".join(f"{count} {kind}(s)" for kind, count in discarded.items())
+        )
+
+
+##############################################
+def migrate_tournaments(competition, tournament, storage=""):
+    """Migrate the matches and grades of tournaments to the current record format,
+    and optionally to another storage backend"""
+
+    # the current backend is the one configured for the competition
+    competition_meta = read_yaml(f"competitions/{competition}/competition.yaml")
+    source = competition_meta.get("storage", "json")
+    target = storage if storage != "" else source
+
+    for tournament_name in resolve_tournaments(competition, tournament):
+        print(f"  migrating {tournament_name.upper()} of competition {competition.upper()}")
+        migrate_records(
+            competition,
+            tournament_name,
+            source,
+            target,
+            competition_meta.get("compression", "none"),
+        )
+
+    if target != source:
+        print(
+            f"Set 'storage: {target}' in competitions/{competition}/competition.yaml to use the migrated records."
+        )
+
+
+##############################################
+def compress_competition(competition, compression):
+    """Convert all performance, content, match and grade files of a competition to a compression format"""
+
+    filenames = [
+        filename
+        for pattern in (
+            "performances/*",
+            "content/*/*",
+            "tournaments/*/matches/*",
+            "tournaments/*/grades/*",
+        )
+        for filename in glob.glob(f"competitions/{competition}/{pattern}")
+        if split_json_filename(filename)[0] is not None
+    ]
+
+    converted = read_in_parallel(
+        lambda filename: convert_json(filename, compression), filenames
+    )
+    print(f"    converted {sum(converted)} of {len(filenames)} files to {compression}")
+
+    print(
+        f"Set 'compression: {compression}' in competitions/{competition}/competition.yaml to write new files in this format."
+    )
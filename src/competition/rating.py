@@ -0,0 +1,109 @@
+import math
+
+# The Glicko-2 rating of a new player on the familiar Elo scale
+INITIAL_RATING = 1500.0
+INITIAL_RATING_DEVIATION = 350.0
+INITIAL_VOLATILITY = 0.06
+
+# The system constant constraining the change in volatility
+TAU = 0.5
+
+# The factor converting between the Elo scale and the Glicko-2 scale
+GLICKO2_SCALE = 173.7178
+
+# The convergence tolerance of the volatility iteration
+CONVERGENCE_TOLERANCE = 0.000001
+
+
+##############################################
+def get_initial_rating():
+    """Get rating, rating deviation and volatility of a new player"""
+    return {
+        "rating": INITIAL_RATING,
+        "rating_deviation": INITIAL_RATING_DEVIATION,
+        "volatility": INITIAL_VOLATILITY,
+    }
+
+
+##############################################
+def _g(phi):
+    """Reduce the impact of a game by the opponent's uncertainty"""
+    return 1.0 / math.sqrt(1.0 + 3.0 * phi**2 / math.pi**2)
+
+
+##############################################
+def _update_volatility(phi, sigma, delta, v):
+    """Determine the new volatility with the Illinois algorithm of the Glicko-2 paper"""
+
+    a = math.log(sigma**2)
+
+    def f(x):
+        ex = math.exp(x)
+        return (ex * (delta**2 - phi**2 - v - ex)) / (
+            2.0 * (phi**2 + v + ex) ** 2
+        ) - (x - a) / TAU**2
+
+    A = a
+    if delta**2 > phi**2 + v:
+        B = math.log(delta**2 - phi**2 - v)
+    else:
+        k = 1
+        while f(a - k * TAU) < 0:
+            k += 1
+        B = a - k * TAU
+
+    f_A = f(A)
+    f_B = f(B)
+    while abs(B - A) > CONVERGENCE_TOLERANCE:
+        C = A + (A - B) * f_A / (f_B - f_A)
+        f_C = f(C)
+        if f_C * f_B <= 0:
+            A, f_A = B, f_B
+        else:
+            f_A /= 2.0
+        B, f_B = C, f_C
+
+    return math.exp(A / 2.0)
+
+
+##############################################
+def _update_rating(player, opponent, score):
+    """Compute the new Glicko-2 rating of a player after a single game,
+    scored 1 for a win, 0.5 for a draw and 0 for a loss"""
+
+    # convert to the Glicko-2 scale
+    mu = (player["rating"] - INITIAL_RATING) / GLICKO2_SCALE
+    phi = player["rating_deviation"] / GLICKO2_SCALE
+    mu_opponent = (opponent["rating"] - INITIAL_RATING) / GLICKO2_SCALE
+    phi_opponent = opponent["rating_deviation"] / GLICKO2_SCALE
+
+    # estimated variance and improvement based on the game outcome
+    g = _g(phi_opponent)
+    expected = 1.0 / (1.0 + math.exp(-g * (mu - mu_opponent)))
+    v = 1.0 / (g**2 * expected * (1.0 - expected))
+    delta = v * g * (score - expected)
+
+    # new volatility, deviation and rating
+    sigma = _update_volatility(phi, player["volatility"], delta, v)
+    phi_star = math.sqrt(phi**2 + sigma**2)
+    phi = 1.0 / math.sqrt(1.0 / phi_star**2 + 1.0 / v)
+    mu += phi**2 * g * (score - expected)
+
+    # convert back to the Elo scale
+    return {
+        "rating": INITIAL_RATING + GLICKO2_SCALE * mu,
+        "rating_deviation": GLICKO2_SCALE * phi,
+        "volatility": sigma,
+    }
+
+
+##############################################
+def update_ratings(player_A, player_B, score_A):
+    """Update the ratings of two players in place after a match, treating the
+    match as its own rating period; score_A is 1 if A won, 0.5 for a draw, 0 if B won"""
+
+    rating_A = _update_rating(player_A, player_B, score_A)
+    rating_B = _update_rating(player_B, player_A, 1.0 - score_A)
+
+    player_A.update(rating_A)
+    player_B.update(rating_B)
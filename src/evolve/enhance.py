@@ -1,9 +1,14 @@
 import re
-import os
-from ruamel.yaml import YAML
 from src.llm import complete
 from analyze.analyze import get_player_critique
-from .helper import LS, EVOLUTION_MODEL, generate_random_id, ensure_single_placeholder_occurrence
+from .helper import (
+    LS,
+    EVOLUTION_MODEL,
+    generate_random_id,
+    get_evaluation,
+    write_player,
+    ensure_single_placeholder_occurrence,
+)
 
 ##############################################
 PLAYER_CRITIQUES = """Tournament "{tournament}":
@@ -61,8 +66,8 @@ def enhance_player(tournaments, player_name, player_prefix, variations=1):
                 "competition": tournament["meta"]["competition"]["name"],
                 "tournament": tournament["meta"]["tournament"],
                 "critique": get_player_critique(tournament, player_name, True),
-                "objective": tournament["evaluation"]["objective"],
-                "criteria": tournament["evaluation"]["criteria"],
+                "objective": get_evaluation(tournament)["objective"],
+                "criteria": get_evaluation(tournament).get("criteria", ""),
                 "player_name": player_name,
             }
         )
@@ -85,7 +90,7 @@ def enhance_player(tournaments, player_name, player_prefix, variations=1):
         enhanced_players.append(enhanced_player)
 
         print(f"Generating {enhanced_player} - variation {ix+1} of {variations}...")
-        enhanced_completion = complete(EVOLUTION_MODEL, 1.0, prompt)
+        enhanced_completion = complete(EVOLUTION_MODEL, prompt=prompt, temperature=1.0)
 
         # clean
         enhanced_completion = re.sub(r"===[A-Z\s]+===", "", enhanced_completion)
@@ -95,21 +100,18 @@ def enhance_player(tournaments, player_name, player_prefix, variations=1):
         enhanced_completion = ensure_single_placeholder_occurrence(enhanced_completion, "text")
 
         # save fused prompt
-        yaml = YAML()
         player_filename = f"competitions/{critiques[0]['competition']}/players/{enhanced_player}.yaml"
-        os.makedirs(os.path.dirname(player_filename), exist_ok=True)
-        with open(player_filename, "w") as f:
-            yaml.dump(
-                {
-                    "name": enhanced_player,
-                    "model": player["model"],
-                    "temperature": player["temperature"],
-                    "ancestor": player_name,
-                    "critique": LS(critique_summary),
-                    "prompt": LS(enhanced_completion),
-                },
-                f,
-            )
+        write_player(
+            player_filename,
+            {
+                "name": enhanced_player,
+                "model": player["model"],
+                "temperature": player["temperature"],
+                "ancestor": player_name,
+                "critique": LS(critique_summary),
+                "prompt": LS(enhanced_completion),
+            },
+        )
 
     # return list of enhanced players
     return enhanced_players
@@ -1,11 +1,13 @@
 import os
 import math
 import random
+import concurrent.futures
 from src.play.play import play
+from src.storage.files import write_file
 from .invent import invent_player
 from .enhance import enhance_player
 from .merge import merge_players
-from src.analyze.analyze import analyze_tournaments
+from analyze.analyze import analyze_tournaments, get_player_critiques
 
 
 # The number of matches for full evaluation
@@ -29,6 +31,9 @@ INVENTION_MODELS = ["gpt-3.5-turbo-instruct"]
 # The temperature for new inventions
 INVENTION_TEMPERATURE = 0.0
 
+# The number of challengers generated concurrently
+CHALLENGER_WORKERS = 4
+
 
 ##############################################
 def _collect_winners(tournaments, reference_player, number_of_winners):
@@ -95,62 +100,65 @@ def _create_challengers(
     previous_season_winners,
     reference_player,
     challenger_player_set,
+    max_workers=CHALLENGER_WORKERS,
 ):
-    """Create new challenger players based on the winners."""
+    """Create new challenger players based on the winners, generating up to
+    max_workers challengers concurrently."""
+
+    # critique the winners once upfront, as enhancements and merges build on them
+    for tournament in tournaments.values():
+        get_player_critiques(tournament, previous_season_winners, True)
 
     # first, 20% new players through invention
     number_of_inventions = int(0.2 * CHALLENGERS_PER_SEASON)
-    invented_players = invent_player(
-        tournaments,
-        random.choice(INVENTION_MODELS),
-        INVENTION_TEMPERATURE,
-        season,
-        number_of_inventions,
-    )
+    jobs = [
+        (
+            invent_player,
+            (tournaments, random.choice(INVENTION_MODELS), INVENTION_TEMPERATURE, season),
+        )
+        for _ in range(number_of_inventions)
+    ]
 
     # now, 40% through enhancement
     number_of_enhancements = int(0.4 * CHALLENGERS_PER_SEASON)
-    enhanced_players = []
-    for _ in range(number_of_enhancements):
-        enhanced_players.extend(
-            enhance_player(
-                tournaments,
-                random.choice(previous_season_winners),
-                season,
-            )
-        )
+    jobs += [
+        (enhance_player, (tournaments, random.choice(previous_season_winners), season))
+        for _ in range(number_of_enhancements)
+    ]
 
     # finally, generate the rest through merging
     number_of_merges = (
         CHALLENGERS_PER_SEASON - number_of_inventions - number_of_enhancements
     )
-    merged_players = []
-    for _ in range(number_of_merges):
-        merged_players.extend(
-            merge_players(
+    jobs += [
+        (
+            merge_players,
+            (
                 tournaments,
                 random.choice(previous_season_winners),
                 random.choice(previous_season_winners),
                 season,
-            )
+            ),
         )
+        for _ in range(number_of_merges)
+    ]
+
+    # generate the challengers concurrently; each player file is written as it is done
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        challengers = [
+            player
+            for players in executor.map(lambda job: job[0](*job[1]), jobs)
+            for player in players
+        ]
 
-    # now, create the challenger player set
+    # now, create the challenger player set; its existence marks the challengers as complete
     playerset_filename = f"competitions/{next(iter(tournaments.values()))['meta']['competition']['name']}/player_sets/{challenger_player_set}.players"
     os.makedirs(os.path.dirname(playerset_filename), exist_ok=True)
 
-    with open(playerset_filename, "w") as f:
-        f.write(
-            "\n".join(
-                [
-                    f"{p}.yaml"
-                    for p in invented_players
-                    + enhanced_players
-                    + merged_players
-                    + [reference_player]
-                ]
-            )
-        )
+    write_file(
+        playerset_filename,
+        "\n".join([f"{p}.yaml" for p in challengers + [reference_player]]),
+    )
 
 
 ##############################################
@@ -186,7 +194,9 @@ def _cull_challengers(
 
 
 ##############################################
-def evolve_season(competition, player_set, reference_player):
+def evolve_season(
+    competition, player_set, reference_player, max_workers=CHALLENGER_WORKERS
+):
     """Evolve player set based on the last season's winners."""
 
     # find the latest season
@@ -227,6 +237,7 @@ def evolve_season(competition, player_set, reference_player):
             season_winners,
             best_balanced_player,
             challenger_player_set,
+            max_workers,
         )
     else:
         print(f"Continuing audition for player set {challenger_player_set}...")
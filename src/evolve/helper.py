@@ -1,7 +1,11 @@
+import io
+import os
 import random
 import string
 import textwrap
+from ruamel.yaml import YAML
 from ruamel.yaml.scalarstring import LiteralScalarString
+from src.storage.files import write_file
 
 #################################################
 def generate_random_id(length=3):
@@ -23,4 +27,21 @@ def ensure_single_placeholder_occurrence(text, placeholder):
     return text.replace("---fofofox---", f"{placeholder}")
 
 
+#################################################
+def get_evaluation(tournament):
+    """Get the comparison or grading definition of a tournament"""
+    return tournament["comparison"] or tournament["grading"]
+
+
+#################################################
+def write_player(player_filename, player):
+    """Write a player YAML file atomically, so that it is either complete or absent"""
+
+    os.makedirs(os.path.dirname(player_filename), exist_ok=True)
+
+    data = io.StringIO()
+    YAML().dump(player, data)
+    write_file(player_filename, data.getvalue())
+
+
 EVOLUTION_MODEL = "gpt-4-1106-preview"
\ No newline at end of file
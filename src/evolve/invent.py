@@ -1,7 +1,12 @@
-import os
-from ruamel.yaml import YAML
 from src.llm import complete
-from .helper import LS, EVOLUTION_MODEL, generate_random_id, ensure_single_placeholder_occurrence
+from .helper import (
+    LS,
+    EVOLUTION_MODEL,
+    generate_random_id,
+    get_evaluation,
+    write_player,
+    ensure_single_placeholder_occurrence,
+)
 
 ##############################################
 TOURNAMENT_SUMMARIES = """Tournament "{tournament}":
@@ -46,8 +51,8 @@ def invent_player(tournaments, model, temperature, player_prefix, variations=1):
             {
                 "competition": tournament["meta"]["competition"]["name"],
                 "tournament": tournament["meta"]["tournament"],
-                "objective": tournament["evaluation"]["objective"],
-                "criteria": tournament["evaluation"]["criteria"],
+                "objective": get_evaluation(tournament)["objective"],
+                "criteria": get_evaluation(tournament).get("criteria", ""),
             }
         )
 
@@ -72,7 +77,7 @@ def invent_player(tournaments, model, temperature, player_prefix, variations=1):
         invented_players.append(invented_player)
 
         print(f"Generating {invented_player} - variation {ix+1} of {variations}...")
-        invented_completion = complete(EVOLUTION_MODEL, 0.7, prompt)
+        invented_completion = complete(EVOLUTION_MODEL, prompt=prompt, temperature=0.7)
 
         # clean
         invented_completion = invented_completion.strip(" \n'\"")
@@ -81,19 +86,16 @@ def invent_player(tournaments, model, temperature, player_prefix, variations=1):
         invented_completion = ensure_single_placeholder_occurrence(invented_completion, "text")
 
         # save fused prompt
-        yaml = YAML()
         player_filename = f"competitions/{tournament_summaries[0]['competition']}/players/{invented_player}.yaml"
-        os.makedirs(os.path.dirname(player_filename), exist_ok=True)
-        with open(player_filename, "w") as f:
-            yaml.dump(
-                {
-                    "name": invented_player,
-                    "model": model,
-                    "temperature": temperature,
-                    "prompt": LS(invented_completion),
-                },
-                f,
-            )
+        write_player(
+            player_filename,
+            {
+                "name": invented_player,
+                "model": model,
+                "temperature": temperature,
+                "prompt": LS(invented_completion),
+            },
+        )
 
     # return list of enhanced players
     return invented_players
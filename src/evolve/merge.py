@@ -1,12 +1,12 @@
 import re
-import os
-from ruamel.yaml import YAML
 from analyze.analyze import get_player_critique
 from src.llm import complete
 from .helper import (
     LS,
     EVOLUTION_MODEL,
     generate_random_id,
+    get_evaluation,
+    write_player,
     ensure_single_placeholder_occurrence,
 )
 
@@ -79,8 +79,8 @@ def merge_players(
                 "tournament": tournament["meta"]["tournament"],
                 "critique_A": get_player_critique(tournament, player_A_name, True),
                 "critique_B": get_player_critique(tournament, player_B_name, True),
-                "objective": tournament["evaluation"]["objective"],
-                "criteria": tournament["evaluation"]["criteria"],
+                "objective": get_evaluation(tournament)["objective"],
+                "criteria": get_evaluation(tournament).get("criteria", ""),
                 "player_A": player_A_name,
                 "player_B": player_B_name,
             }
@@ -106,7 +106,7 @@ def merge_players(
         merged_players.append(merged_player)
 
         print(f"Generating {merged_player} - variation {ix+1} of {variations}...")
-        merged_completion = complete(EVOLUTION_MODEL, 1.0, prompt)
+        merged_completion = complete(EVOLUTION_MODEL, prompt=prompt, temperature=1.0)
 
         # clean
         merged_completion = re.sub(r"===[A-Z\s]+===", "", merged_completion)
@@ -118,24 +118,21 @@ def merge_players(
         )
 
         # save fused prompt
-        yaml = YAML()
         player_filename = (
             f"competitions/{critiques[0]['competition']}/players/{merged_player}.yaml"
         )
-        os.makedirs(os.path.dirname(player_filename), exist_ok=True)
-        with open(player_filename, "w") as f:
-            yaml.dump(
-                {
-                    "name": merged_player,
-                    "model": player_A["model"],
-                    "temperature": player_A["temperature"],
-                    "ancestor-A": player_A_name,
-                    "ancestor-B": player_B_name,
-                    "critiques": LS(critique_summary),
-                    "prompt": LS(merged_completion),
-                },
-                f,
-            )
+        write_player(
+            player_filename,
+            {
+                "name": merged_player,
+                "model": player_A["model"],
+                "temperature": player_A["temperature"],
+                "ancestor-A": player_A_name,
+                "ancestor-B": player_B_name,
+                "critiques": LS(critique_summary),
+                "prompt": LS(merged_completion),
+            },
+        )
 
     # finally return merged players
     return merged_players
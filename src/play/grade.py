@@ -1,8 +1,9 @@
 import re
-import json
 from llm import complete
 from src.competition.leaderboard import update_leaderboard_with_grade
 from src.play.perform import perform, escape_player_name, run_in_parallel
+from src.storage import store_records
+from src.competition.fingerprint import get_grade_fingerprint
 
 
 ##############################################
@@ -142,17 +143,11 @@ def _grade_performance(tournament, challenge_name, player_name):
         "grade": awarded_grade,
         "reasoning": reasoning,
         "challenge": challenge["name"],
+        "fingerprint": get_grade_fingerprint(tournament, challenge_name, player_name),
         "challenge_details": challenge,
         "player_output": performance["output"],
     }
 
-    # store the match
-    with open(
-        f"competitions/{tournament['meta']['competition']['name']}/tournaments/{tournament['meta']['tournament']}/grades/{id}.json",
-        "w",
-    ) as file:
-        json.dump(grade, file, indent=2)
-
     return grade
 
 
@@ -175,8 +170,10 @@ def grade_next_performances(
         if next_min_performances >= min_performances_all_players:
             break
 
-    # grade the performances
-    grades = run_in_parallel(_grade_performance, next_performances, 5)
+    # grade the performances and store them at once, keeping only their index in memory
+    grades = store_records(
+        tournament, "grades", run_in_parallel(_grade_performance, next_performances, 5)
+    )
 
     # store
     for grade in grades:
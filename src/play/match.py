@@ -1,11 +1,13 @@
 import re
-import json
+import time
 import random
 import numpy as np
 from llm import complete
 from competition.leaderboard import update_leaderboard_with_match
 from competition.loader import load_tournament, resolve_tournaments
 from src.play.perform import *
+from src.storage import store_records
+from src.competition.fingerprint import get_match_fingerprint
 
 
 ##############################################
@@ -34,36 +36,28 @@ def _find_match(
 
     # find the number of matches played among players
     labels = list(tournament_state["players"].keys())
-    matches = np.zeros(
-        (len(tournament_state["players"]), len(tournament_state["players"]))
-    )
-
-    for match in tournament_state["matches"].values():
-        player_A_ix = labels.index(match["player_A"]["name"])
-        player_B_ix = labels.index(match["player_B"]["name"])
-
-        matches[player_A_ix, player_B_ix] += 1
-        matches[player_B_ix, player_A_ix] += 1
+    player_index = {label: i for i, label in enumerate(labels)}
+    pairs = [
+        (match["player_A"]["name"], match["player_B"]["name"])
+        for match in tournament_state["matches"].values()
+    ]
 
     # add scheduled matches
-    for match in scheduled_matches:
-        player_A_ix = labels.index(match[2])
-        player_B_ix = labels.index(match[3])
+    pairs += [(match[2], match[3]) for match in scheduled_matches]
 
-        matches[player_A_ix, player_B_ix] += 1
-        matches[player_B_ix, player_A_ix] += 1
+    player_A_ix = np.array([player_index[A] for A, _B in pairs], dtype=np.intp)
+    player_B_ix = np.array([player_index[B] for _A, B in pairs], dtype=np.intp)
+    matches = np.zeros((len(labels), len(labels)))
+    np.add.at(matches, (player_A_ix, player_B_ix), 1)
+    np.add.at(matches, (player_B_ix, player_A_ix), 1)
 
     # make sure to ignore diagonal
-    for i in range(len(labels)):
-        matches[i, i] = 100000
+    np.fill_diagonal(matches, 100000)
 
     # if a player is given, make sure to ignore other pairings
     if player_name is not None:
-        for i, player_A_name in enumerate(labels):
-            for j, player_B_name in enumerate(labels):
-                if player_A_name != player_name and player_B_name != player_name:
-                    matches[i, j] = 100000
-                    matches[j, i] = 100000
+        others = np.array([label != player_name for label in labels])
+        matches[np.ix_(others, others)] = 100000
 
     # find the pair of players with the least matches
     min_matches = int(np.min(matches))
@@ -164,18 +158,14 @@ def _play_match(tournament, challenge_name, player_A_name, player_B_name):
         "player_B": {"name": player_B_name},
         "result": {"winner": winner_name, "assessment": assessment},
         "challenge": challenge["name"],
+        "fingerprint": get_match_fingerprint(
+            tournament, challenge_name, player_A_name, player_B_name
+        ),
         "challenge_details": challenge,
         "player_A_output": player_A_output,
         "player_B_output": player_B_output,
     }
 
-    # store the match
-    with open(
-        f"competitions/{tournament['meta']['competition']['name']}/tournaments/{tournament['meta']['tournament']}/matches/{id}.json",
-        "w",
-    ) as file:
-        json.dump(match, file, indent=2)
-
     return match
 
 
@@ -200,12 +190,15 @@ def play_next_matches(
         if next_min_matches >= min_matches_all_players:
             break
 
-    # play the matches
-    matches = run_in_parallel(_play_match, next_matches, 5)
+    # play the matches and store them at once, keeping only their index in memory
+    matches = store_records(
+        tournament, "matches", run_in_parallel(_play_match, next_matches, 5)
+    )
 
     # update leaderboard
     for match in matches:
         tournament["matches"][match["id"]] = match
+        tournament["match_times"][match["id"]] = time.time()
         update_leaderboard_with_match(tournament, match)
 
     # return the new minimum number of matches played
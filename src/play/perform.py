@@ -1,8 +1,21 @@
-import os
-import json
+import time
 import datetime
+import threading
+import collections
 import concurrent.futures
 from llm import complete
+from src.competition.fingerprint import get_performance_fingerprint
+from src.storage.files import read_json, write_json, find_json
+
+# The number of performances kept in memory across all tournaments
+PERFORMANCE_CACHE_SIZE = 4096
+
+# The number of locks that performances are spread over
+PERFORMANCE_LOCK_STRIPES = 256
+
+_performance_cache = collections.OrderedDict()
+_performance_locks = [threading.Lock() for _ in range(PERFORMANCE_LOCK_STRIPES)]
+_cache_lock = threading.Lock()
 
 
 ##############################################
@@ -38,17 +51,62 @@ def _get_performance_id(challenge_name, player_name):
 
 
 ##############################################
-def perform(tournament, challenge_name, player):
-    """Perform a performance for a player"""
+def _get_cached_performance(performance_stem, fingerprint):
+    """Get a performance from the in-memory cache, if it is there and up to date"""
+
+    with _cache_lock:
+        performance = _performance_cache.get(performance_stem)
+        if performance is None:
+            return None
+
+        # same staleness rule as for stored performances
+        if performance.get("fingerprint", fingerprint) != fingerprint:
+            del _performance_cache[performance_stem]
+            return None
+
+        _performance_cache.move_to_end(performance_stem)
+        return performance
+
+
+##############################################
+def _cache_performance(performance_stem, performance):
+    """Put a performance into the in-memory cache, evicting the least recently used"""
+
+    with _cache_lock:
+        _performance_cache[performance_stem] = performance
+        _performance_cache.move_to_end(performance_stem)
+        while len(_performance_cache) > PERFORMANCE_CACHE_SIZE:
+            _performance_cache.popitem(last=False)
+
+
+##############################################
+def _load_or_create_performance(
+    tournament, challenge_name, player, performance_id, performance_stem, fingerprint
+):
+    """Load a stored performance, or create and store it if missing or outdated"""
+
+    # only look up performances found when the competition was loaded
+    performance_file = None
+    if performance_id in tournament["performances"]:
+        performance_file = find_json(performance_stem)
 
-    performance_file = f"competitions/{tournament['meta']['competition']['name']}/performances/{_get_performance_id(challenge_name, player['name'])}.json"
-    if not os.path.exists(performance_file):
+    performance = None
+    if performance_file is not None:
+        # load the performance
+        performance = read_json(performance_file)
+
+        # discard it if performed on other player or challenge settings
+        if performance.get("fingerprint", fingerprint) != fingerprint:
+            performance = None
+
+    if performance is None:
         # create the performance
         challenge = tournament["challenges"][challenge_name]
         challenge["date"] = f"{datetime.datetime.now():%Y-%m-%d}"
         performance = {
             "player": player["name"],
             "challenge": challenge_name,
+            "fingerprint": fingerprint,
             "output": complete(
                 system=player.get("system", ""),
                 prompt=player["prompt"].format(**challenge),
@@ -58,11 +116,46 @@ def perform(tournament, challenge_name, player):
         }
         
         # store the performance
-        with open(performance_file, "w") as file:
-            json.dump(performance, file, indent=2)
-    else:
-        # load the performance
-        with open(performance_file, "r") as file:
-            performance = json.load(file)
+        write_json(
+            performance_stem,
+            performance,
+            tournament["meta"]["competition"].get("compression", "none"),
+            indent=2,
+        )
+        tournament["performances"][performance_id] = time.time()
+
+    return performance
+
+
+##############################################
+def perform(tournament, challenge_name, player):
+    """Perform a performance for a player"""
+
+    performance_id = _get_performance_id(challenge_name, player["name"])
+    performance_stem = f"competitions/{tournament['meta']['competition']['name']}/performances/{performance_id}"
+    fingerprint = get_performance_fingerprint(
+        tournament["challenges"].info(challenge_name), player
+    )
+
+    performance = _get_cached_performance(performance_stem, fingerprint)
+    if performance is not None:
+        return performance
+
+    # only one thread performs a given performance, the others wait for it
+    with _performance_locks[hash(performance_stem) % PERFORMANCE_LOCK_STRIPES]:
+        performance = _get_cached_performance(performance_stem, fingerprint)
+        if performance is None:
+            performance = _load_or_create_performance(
+                tournament,
+                challenge_name,
+                player,
+                performance_id,
+                performance_stem,
+                fingerprint,
+            )
+
+            # performances of older versions have no fingerprint, so are not cached
+            if "fingerprint" in performance:
+                _cache_performance(performance_stem, performance)
 
     return performance
@@ -1,6 +1,11 @@
-from src.competition.loader import load_tournament, resolve_tournaments
+from src.competition.loader import (
+    load_competition,
+    load_tournament,
+    resolve_tournaments,
+)
 from src.play.match import play_next_matches
 from src.play.grade import grade_next_performances
+from src.competition.leaderboard import finish_leaderboard
 
 
 ##############################################
@@ -9,10 +14,15 @@ def play(competition, tournament_name, player_set, number_games, player_name=Non
 
     objective = f"against {player_name}" if player_name else "for all player pairs"
 
+    # load players, challenges and performances once for all tournaments
+    competition_state = load_competition(competition, player_set)
+
     tournaments = {}
     for tournament_name in resolve_tournaments(competition, tournament_name):
         # load the tournament
-        tournament = load_tournament(competition, tournament_name, player_set)
+        tournament = load_tournament(
+            competition, tournament_name, player_set, competition_state
+        )
         tournaments[tournament_name] = tournament
 
         # does this tournament have a competitive evaluation?
@@ -32,6 +42,9 @@ def play(competition, tournament_name, player_set, number_games, player_name=Non
                 if min_matches_all_players >= number_games:
                     break
 
+            # persist the updates not yet written by the debounced saves
+            finish_leaderboard(tournament)
+
         # does the tournament have a grading evaluation?
         if tournament["grading"] is not None:
             # yes, so we grade players until we have given performances covered
@@ -56,4 +69,7 @@ def play(competition, tournament_name, player_set, number_games, player_name=Non
                 if min_performances_all_players >= number_grades:
                     break
 
+            # persist the updates not yet written by the debounced saves
+            finish_leaderboard(tournament)
+
     return tournaments
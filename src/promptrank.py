@@ -6,8 +6,13 @@ import logging
 import argparse
 import datetime
 from analyze.analyze import analyze
-from evolve.evolve import evolve_season
+from evolve.evolve import CHALLENGER_WORKERS, evolve_season
 from play.play import play
+from src.competition.loader import (
+    migrate_tournaments,
+    report_outdated,
+    compress_competition,
+)
 
 
 def _build_parser():
@@ -56,6 +61,48 @@ def _build_parser():
         action="store_true",
         help="If set, generate critique of players' strengths and weaknesses.",
     )
+    analyze_parser.add_argument(
+        "-m",
+        "--method",
+        type=str,
+        choices=["lsq", "bt"],
+        default="lsq",
+        help="Method to estimate ELO: least-squares fit to the winning likelihoods (lsq) or Bradley-Terry maximum likelihood with standard errors (bt).",
+    )
+    analyze_parser.add_argument(
+        "-b",
+        "--bootstrap",
+        type=int,
+        default=0,
+        help="Number of bootstrap samples of the matches for confidence intervals of ELO and score (optional; if not given, no intervals are computed).",
+    )
+    analyze_parser.add_argument(
+        "-s",
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed of the bootstrap, for reproducible intervals.",
+    )
+    analyze_parser.add_argument(
+        "-u",
+        "--skip-unchanged",
+        action="store_true",
+        help="If set, do not re-render charts whose players and matches are unchanged since the last analysis.",
+    )
+    analyze_parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="If set, re-analyze all tournaments, including those unchanged since the last analysis.",
+    )
+    analyze_parser.add_argument(
+        "-e",
+        "--export",
+        type=str,
+        choices=["xlsx", "csv", "parquet"],
+        default="xlsx",
+        help="File format of the grades exported for grading tournaments.",
+    )
 
     # 'evolve' command parser
     evolve_parser = subparsers.add_parser(
@@ -68,6 +115,47 @@ def _build_parser():
         type=str,
         help="Name of the referenec player for initial auditions.",
     )
+    evolve_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=CHALLENGER_WORKERS,
+        help="Number of challengers generated concurrently.",
+    )
+
+    # 'outdated' command parser
+    subparsers.add_parser(
+        "outdated",
+        help="Report matches, grades and performances that would be discarded as outdated.",
+    )
+
+    # 'migrate' command parser
+    migrate_parser = subparsers.add_parser(
+        "migrate",
+        help="Migrate matches and grades to the current record format or another storage backend.",
+    )
+    migrate_parser.add_argument(
+        "-s",
+        "--storage",
+        type=str,
+        choices=["json", "sqlite"],
+        default="",
+        help="Name of the target storage backend (optional; if not given, records are migrated in place).",
+    )
+
+    # 'compress' command parser
+    compress_parser = subparsers.add_parser(
+        "compress",
+        help="Convert stored performances, matches and grades to a compression format.",
+    )
+    compress_parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=["none", "gzip", "zstd"],
+        default="gzip",
+        help="Name of the compression format.",
+    )
 
     return parser
 
@@ -82,10 +170,27 @@ def main():
         play(args.competition, args.tournament, args.players, args.number)
     elif args.command == "analyze":
         analyze(
-            args.competition, args.tournament, args.players, args.critique
+            args.competition,
+            args.tournament,
+            args.players,
+            args.critique,
+            args.method,
+            args.bootstrap,
+            args.seed,
+            args.skip_unchanged,
+            args.force,
+            args.export,
         )
     elif args.command == "evolve":
-        evolve_season(args.competition, args.players, args.reference_player)
+        evolve_season(
+            args.competition, args.players, args.reference_player, args.workers
+        )
+    elif args.command == "outdated":
+        report_outdated(args.competition, args.tournament, args.players)
+    elif args.command == "migrate":
+        migrate_tournaments(args.competition, args.tournament, args.storage)
+    elif args.command == "compress":
+        compress_competition(args.competition, args.format)
     else:
         print("Invalid command. Use -h for help.")
 
@@ -0,0 +1,150 @@
+import functools
+from .json_storage import (
+    load_json_records,
+    load_json_record,
+    store_json_records,
+    delete_json_record,
+)
+from .sqlite_storage import (
+    load_sqlite_records,
+    load_sqlite_record,
+    store_sqlite_records,
+    delete_sqlite_record,
+)
+from .content import normalize_record, load_content
+from .record import LazyRecord, index_record
+
+
+##############################################
+STORAGE_BACKENDS = {
+    "json": (load_json_records, load_json_record, store_json_records, delete_json_record),
+    "sqlite": (
+        load_sqlite_records,
+        load_sqlite_record,
+        store_sqlite_records,
+        delete_sqlite_record,
+    ),
+}
+
+
+##############################################
+def _get_backend(storage):
+    """Get the load index, load record, store and delete functions of a storage backend"""
+
+    if storage not in STORAGE_BACKENDS:
+        print(f"Unknown storage {storage}")
+        exit(-1)
+
+    return STORAGE_BACKENDS[storage]
+
+
+##############################################
+def _resolve(tournament):
+    """Get competition name, tournament name and backend of a tournament state"""
+
+    return (
+        tournament["meta"]["competition"]["name"],
+        tournament["meta"]["tournament"],
+        _get_backend(tournament["meta"]["competition"].get("storage", "json")),
+    )
+
+
+##############################################
+@functools.lru_cache(maxsize=256)
+def _load_body(storage, competition, tournament, kind, record_id):
+    """Load the full body of a record, caching recently used ones"""
+
+    _load_index, load_one, _store, _delete = _get_backend(storage)
+    return load_one(competition, tournament, kind, record_id)
+
+
+##############################################
+def _get_lazy_record(tournament, kind, index):
+    """Wrap the index of a record so that its body and payloads load on access"""
+
+    competition, tournament_name, _backend = _resolve(tournament)
+    storage = tournament["meta"]["competition"].get("storage", "json")
+
+    return LazyRecord(
+        index,
+        lambda: _load_body(storage, competition, tournament_name, kind, index["id"]),
+        lambda content_id: load_content(competition, content_id),
+    )
+
+
+##############################################
+def load_records(tournament, kind):
+    """Load all records of a kind ("matches" or "grades"), yielding (id, record, updated) tuples.
+
+    Only the index of each record is held in memory; the body is loaded when accessed."""
+
+    competition, tournament_name, (load, _load_one, _store, _delete) = _resolve(
+        tournament
+    )
+    for record_id, index, updated in load(competition, tournament_name, kind):
+        yield record_id, _get_lazy_record(tournament, kind, index), updated
+
+
+##############################################
+def store_records(tournament, kind, records):
+    """Store records of a kind in a single write, with payloads referenced by content hash.
+
+    Returns the records as lazy index records, to keep memory bounded."""
+
+    competition, tournament_name, (_load, _load_one, store, _delete) = _resolve(
+        tournament
+    )
+    compression = tournament["meta"]["competition"].get("compression", "none")
+    store(
+        competition,
+        tournament_name,
+        kind,
+        [normalize_record(competition, record, compression) for record in records],
+        compression=compression,
+    )
+
+    # cached bodies of replaced records are stale now
+    _load_body.cache_clear()
+
+    return [
+        _get_lazy_record(tournament, kind, index_record(record)) for record in records
+    ]
+
+
+##############################################
+def delete_record(tournament, kind, record_id):
+    """Delete a record of a kind"""
+
+    competition, tournament_name, (_load, _load_one, _store, delete) = _resolve(
+        tournament
+    )
+    delete(competition, tournament_name, kind, record_id)
+    _load_body.cache_clear()
+
+
+##############################################
+def migrate_records(competition, tournament, source, target, compression="none"):
+    """Copy all matches and grades of a tournament from one storage backend to another,
+    moving payloads embedded by older versions into the content store"""
+
+    load, load_one, _store, _delete = _get_backend(source)
+    _load, _load_one, store, _delete = _get_backend(target)
+
+    for kind in ("matches", "grades"):
+        rows = list(load(competition, tournament, kind))
+        store(
+            competition,
+            tournament,
+            kind,
+            [
+                normalize_record(
+                    competition,
+                    load_one(competition, tournament, kind, record_id),
+                    compression,
+                )
+                for record_id, _, _ in rows
+            ],
+            updated=[updated for _, _, updated in rows],
+            compression=compression,
+        )
+        print(f"    migrated {len(rows)} {kind} from {source} to {target}")
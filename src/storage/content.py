@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+import functools
+from .files import read_json, write_json, find_json
+
+
+# Record fields holding large payloads that are stored once by content hash
+PAYLOAD_FIELDS = (
+    "challenge_details",
+    "player_A_output",
+    "player_B_output",
+    "player_output",
+)
+
+
+##############################################
+def content_hash(content):
+    """Calculate the hash of JSON-serializable content"""
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+##############################################
+def _get_content_stem(competition, content_id):
+    """Get the filename of a content blob without its JSON suffix"""
+    return f"competitions/{competition}/content/{content_id[:2]}/{content_id}"
+
+
+##############################################
+def store_content(competition, content, compression="none"):
+    """Store content once under its hash and return the hash"""
+
+    content_id = content_hash(content)
+    content_stem = _get_content_stem(competition, content_id)
+
+    if find_json(content_stem) is None:
+        os.makedirs(os.path.dirname(content_stem), exist_ok=True)
+        try:
+            write_json(content_stem, content, compression)
+        except OSError:
+            # content is immutable, so a copy stored concurrently is as good
+            if find_json(content_stem) is None:
+                raise
+
+    return content_id
+
+
+##############################################
+@functools.lru_cache(maxsize=1024)
+def load_content(competition, content_id):
+    """Load content by its hash"""
+
+    return read_json(find_json(_get_content_stem(competition, content_id)))
+
+
+##############################################
+def normalize_record(competition, record, compression="none"):
+    """Replace the payload fields of a record by references to stored content"""
+
+    normalized = {k: v for k, v in record.items() if k not in PAYLOAD_FIELDS}
+    refs = dict(record.get("refs", {}))
+
+    for field in PAYLOAD_FIELDS:
+        if field in record:
+            refs[field] = store_content(competition, record[field], compression)
+
+    if len(refs) > 0:
+        normalized["refs"] = refs
+
+    return normalized
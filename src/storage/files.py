@@ -0,0 +1,193 @@
+import os
+import copy
+import gzip
+import json
+import uuid
+import functools
+import concurrent.futures
+import yaml
+
+# use the faster decoders when available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# zstd compression is optional
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# The file suffixes of JSON files per compression format
+COMPRESSION_SUFFIXES = {"none": ".json", "gzip": ".json.gz", "zstd": ".json.zst"}
+
+
+##############################################
+def decode_json(text):
+    """Decode a JSON string"""
+
+    if orjson is not None:
+        return orjson.loads(text)
+
+    return json.loads(text)
+
+
+##############################################
+def split_json_filename(filename):
+    """Split a JSON filename into its stem and compression format, or (None, None) if it is no JSON file"""
+
+    # check the longer compressed suffixes first
+    for compression, suffix in sorted(
+        COMPRESSION_SUFFIXES.items(), key=lambda x: -len(x[1])
+    ):
+        if filename.endswith(suffix):
+            return filename[: -len(suffix)], compression
+
+    return None, None
+
+
+##############################################
+def find_json(stem):
+    """Find the JSON file with the given stem in any compression format, or None"""
+
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if os.path.exists(stem + suffix):
+            return stem + suffix
+
+    return None
+
+
+##############################################
+def _check_compression(compression):
+    """Make sure a compression format is supported"""
+
+    if compression not in COMPRESSION_SUFFIXES:
+        print(f"Unknown compression {compression}")
+        exit(-1)
+
+    if compression == "zstd" and zstandard is None:
+        print("zstd compression requires the zstandard package")
+        exit(-1)
+
+
+##############################################
+def read_json(filename):
+    """Read and decode a JSON file, decompressing it according to its suffix"""
+
+    with open(filename, "rb") as file:
+        data = file.read()
+
+    _stem, compression = split_json_filename(filename)
+    if compression == "gzip":
+        data = gzip.decompress(data)
+    elif compression == "zstd":
+        _check_compression(compression)
+        data = zstandard.ZstdDecompressor().decompress(data)
+
+    return decode_json(data)
+
+
+##############################################
+def write_file(filename, data):
+    """Write text or bytes atomically to a file, through a temp file of unique
+    name, as several threads or processes may write the same file"""
+
+    tmp_filename = f"{filename}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_filename, "wb" if isinstance(data, bytes) else "w") as file:
+            file.write(data)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+
+##############################################
+def write_json(stem, content, compression="none", indent=None, updated=None):
+    """Write content atomically to a JSON file with the given stem in a compression format,
+    replacing the file in any other format, and return the filename"""
+
+    _check_compression(compression)
+
+    data = json.dumps(content, indent=indent).encode("utf-8")
+    if compression == "gzip":
+        data = gzip.compress(data, mtime=0)
+    elif compression == "zstd":
+        data = zstandard.ZstdCompressor().compress(data)
+
+    filename = stem + COMPRESSION_SUFFIXES[compression]
+    write_file(filename, data)
+
+    # keep a given timestamp, e.g. when converting files
+    if updated is not None:
+        os.utime(filename, (updated, updated))
+
+    remove_json(stem, keep=filename)
+    return filename
+
+
+##############################################
+def remove_json(stem, keep=None):
+    """Remove the JSON files with the given stem in all compression formats"""
+
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if stem + suffix != keep and os.path.exists(stem + suffix):
+            os.remove(stem + suffix)
+
+
+##############################################
+def convert_json(filename, compression):
+    """Convert a JSON file to a compression format, keeping its timestamp"""
+
+    stem, current = split_json_filename(filename)
+    if current == compression:
+        return False
+
+    write_json(
+        stem,
+        read_json(filename),
+        compression,
+        indent=2 if compression == "none" else None,
+        updated=os.path.getmtime(filename),
+    )
+    return True
+
+
+##############################################
+@functools.lru_cache(maxsize=4096)
+def _read_yaml_cached(filename, mtime, size):
+    """Read and decode a YAML file, cached by its modification time and size"""
+
+    with open(filename, "r") as file:
+        return yaml.load(file, Loader=YAML_LOADER)
+
+
+##############################################
+def read_yaml(filename, cached=True):
+    """Read and decode a YAML file, re-parsing it only when it changed unless
+    it is not to be cached"""
+
+    if not cached:
+        with open(filename, "r") as file:
+            return yaml.load(file, Loader=YAML_LOADER)
+
+    stat = os.stat(filename)
+
+    # callers annotate the returned structure, so hand out a copy
+    return copy.deepcopy(_read_yaml_cached(filename, stat.st_mtime_ns, stat.st_size))
+
+
+##############################################
+def read_in_parallel(fun, filenames, max_workers=16):
+    """Read files in parallel, returning the results in the order of the filenames"""
+
+    filenames = list(filenames)
+    if len(filenames) < 2:
+        return [fun(filename) for filename in filenames]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fun, filenames))
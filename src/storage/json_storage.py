@@ -0,0 +1,136 @@
+import os
+import json
+from .record import index_record
+from .files import (
+    read_json,
+    write_json,
+    write_file,
+    find_json,
+    remove_json,
+    split_json_filename,
+    read_in_parallel,
+)
+
+
+##############################################
+def _get_record_dir(competition, tournament, kind):
+    """Get the directory holding the records of a kind"""
+    return f"competitions/{competition}/tournaments/{tournament}/{kind}"
+
+
+##############################################
+def _get_record_stem(competition, tournament, kind, record_id):
+    """Get the filename of a record without its JSON suffix"""
+    return f"{_get_record_dir(competition, tournament, kind)}/{record_id}"
+
+
+##############################################
+def _get_manifest_filename(competition, tournament, kind):
+    """Get the filename of the manifest caching the parsed records of a kind"""
+    return f"competitions/{competition}/tournaments/{tournament}/{kind}.manifest.json"
+
+
+##############################################
+def _load_manifest(manifest_filename):
+    """Load a manifest, or an empty one if it does not exist or is unreadable"""
+
+    if os.path.exists(manifest_filename):
+        try:
+            return read_json(manifest_filename)
+        except ValueError:
+            print(f"      WARNING: ignoring corrupt manifest {manifest_filename}")
+
+    return {}
+
+
+##############################################
+def _save_manifest(manifest_filename, manifest):
+    """Save a manifest atomically"""
+
+    write_file(manifest_filename, json.dumps(manifest))
+
+
+##############################################
+def load_json_records(competition, tournament, kind):
+    """Load the index of all records of a kind, yielding (id, index, updated) tuples.
+
+    Indexes are cached in a manifest keyed by filename, mtime and size,
+    so only new or changed files are parsed again."""
+
+    record_dir = _get_record_dir(competition, tournament, kind)
+    if not os.path.isdir(record_dir):
+        return
+
+    manifest_filename = _get_manifest_filename(competition, tournament, kind)
+    manifest = _load_manifest(manifest_filename)
+
+    # find the files that are new or changed since the manifest was written
+    with os.scandir(record_dir) as entries:
+        stats = {
+            entry.name: entry.stat()
+            for entry in entries
+            if split_json_filename(entry.name)[0] is not None
+        }
+
+    changed = [
+        name
+        for name, stat in stats.items()
+        if name not in manifest
+        or "index" not in manifest[name]
+        or manifest[name]["mtime"] != stat.st_mtime
+        or manifest[name]["size"] != stat.st_size
+    ]
+
+    # parse them in parallel
+    updated_manifest = {name: manifest[name] for name in stats if name not in changed}
+    for name, record in zip(
+        changed,
+        read_in_parallel(read_json, [f"{record_dir}/{name}" for name in changed]),
+    ):
+        updated_manifest[name] = {
+            "mtime": stats[name].st_mtime,
+            "size": stats[name].st_size,
+            "index": index_record(record),
+        }
+
+    # persist if any file was added, changed or removed
+    if len(changed) > 0 or len(updated_manifest) != len(manifest):
+        _save_manifest(manifest_filename, updated_manifest)
+
+    for name, cached in updated_manifest.items():
+        yield split_json_filename(name)[0], cached["index"], cached["mtime"]
+
+
+##############################################
+def load_json_record(competition, tournament, kind, record_id):
+    """Load a single full record"""
+
+    return read_json(
+        find_json(_get_record_stem(competition, tournament, kind, record_id))
+    )
+
+
+##############################################
+def store_json_records(
+    competition, tournament, kind, records, updated=None, compression="none"
+):
+    """Store records atomically, each one to its own file"""
+
+    os.makedirs(_get_record_dir(competition, tournament, kind), exist_ok=True)
+
+    for i, record in enumerate(records):
+        # keep the original timestamp when migrating records
+        write_json(
+            _get_record_stem(competition, tournament, kind, record["id"]),
+            record,
+            compression,
+            indent=2,
+            updated=updated[i] if updated is not None else None,
+        )
+
+
+##############################################
+def delete_json_record(competition, tournament, kind, record_id):
+    """Delete a record"""
+
+    remove_json(_get_record_stem(competition, tournament, kind, record_id))
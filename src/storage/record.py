@@ -0,0 +1,77 @@
+from .content import PAYLOAD_FIELDS
+
+
+# Record fields that are only needed for critiques, exports and evolution,
+# and are therefore not kept in memory
+BODY_FIELDS = (
+    ("result", "assessment"),
+    ("reasoning",),
+    ("refs",),
+    *[(field,) for field in PAYLOAD_FIELDS],
+)
+
+
+##############################################
+def index_record(record):
+    """Strip a record down to the fields needed for scheduling and leaderboards"""
+
+    index = dict(record)
+    for path in BODY_FIELDS:
+        parent = index
+        for step in path[:-1]:
+            if step not in parent:
+                break
+            parent[step] = dict(parent[step])
+            parent = parent[step]
+        else:
+            parent.pop(path[-1], None)
+
+    return index
+
+
+##############################################
+class LazyRecord(dict):
+    """A match or grade record holding its index fields, which loads the
+    remaining body fields and referenced content on access"""
+
+    def __init__(self, index, load_body, load_content, path=()):
+        super().__init__(index)
+        self._load_body = load_body
+        self._load_content = load_content
+        self._path = path
+
+        # nested records are lazy as well
+        for key, value in index.items():
+            if isinstance(value, dict) and any(
+                p[: len(path) + 1] == (*path, key) for p in BODY_FIELDS
+            ):
+                dict.__setitem__(
+                    self,
+                    key,
+                    LazyRecord(value, load_body, load_content, (*path, key)),
+                )
+
+    def __missing__(self, key):
+        # any other field is absent from the stored record as well
+        if (*self._path, key) not in BODY_FIELDS:
+            raise KeyError(key)
+
+        body = self._load_body()
+        for step in self._path:
+            body = body[step]
+
+        if key in body:
+            return body[key]
+
+        # payloads are stored by content hash at the top level
+        refs = body.get("refs", {}) if len(self._path) == 0 else {}
+        if key in refs:
+            return self._load_content(refs[key])
+
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
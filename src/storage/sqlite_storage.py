@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from .record import BODY_FIELDS
+from .files import decode_json
+
+
+##############################################
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    player_A TEXT,
+    player_B TEXT,
+    challenge TEXT,
+    updated REAL NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS records_player_A ON records (kind, player_A);
+CREATE INDEX IF NOT EXISTS records_player_B ON records (kind, player_B);
+CREATE INDEX IF NOT EXISTS records_challenge ON records (kind, challenge);
+CREATE INDEX IF NOT EXISTS records_pair ON records (kind, player_A, player_B);
+"""
+
+
+# The connections of each thread, by database file
+_connections = threading.local()
+
+# The database files whose schema has been created in this process
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+
+##############################################
+def _connect(competition, tournament):
+    """Get this thread's connection to the tournament database, creating the
+    schema once per database"""
+
+    db_filename = f"competitions/{competition}/tournaments/{tournament}/tournament.db"
+
+    connections = getattr(_connections, "by_filename", None)
+    if connections is None:
+        connections = _connections.by_filename = {}
+
+    if db_filename not in connections:
+        os.makedirs(os.path.dirname(db_filename), exist_ok=True)
+
+        # matches are stored from worker threads, so allow waiting for the write lock
+        connections[db_filename] = sqlite3.connect(db_filename, timeout=60)
+
+    connection = connections[db_filename]
+    with _initialized_lock:
+        if db_filename not in _initialized:
+            connection.executescript(SCHEMA)
+            _initialized.add(db_filename)
+
+    return connection
+
+
+##############################################
+def _get_indexed_columns(record):
+    """Get the player and challenge columns of a match or grade record"""
+
+    if "player" in record:
+        # grades only have a single player
+        return record["player"]["name"], None, record["challenge"]
+
+    return record["player_A"]["name"], record["player_B"]["name"], record["challenge"]
+
+
+##############################################
+def load_sqlite_records(competition, tournament, kind):
+    """Load the index of all records of a kind, yielding (id, index, updated) tuples"""
+
+    # strip the body fields inside the database, so they are never decoded
+    body_paths = ", ".join(
+        "'$." + ".".join(path) + "'" for path in BODY_FIELDS
+    )
+
+    connection = _connect(competition, tournament)
+    rows = connection.execute(
+        f"SELECT id, json_remove(body, {body_paths}), updated FROM records WHERE kind = ?",
+        (kind,),
+    ).fetchall()
+
+    for record_id, index, updated in rows:
+        yield record_id, decode_json(index), updated
+
+
+##############################################
+def load_sqlite_record(competition, tournament, kind, record_id):
+    """Load a single full record"""
+
+    (body,) = (
+        _connect(competition, tournament)
+        .execute("SELECT body FROM records WHERE kind = ? AND id = ?", (kind, record_id))
+        .fetchone()
+    )
+
+    return decode_json(body)
+
+
+##############################################
+def store_sqlite_records(
+    competition, tournament, kind, records, updated=None, compression="none"
+):
+    """Store records in a single transaction; records are not compressed within the database"""
+
+    rows = [
+        (
+            kind,
+            record["id"],
+            *_get_indexed_columns(record),
+            updated[i] if updated is not None else time.time(),
+            json.dumps(record),
+        )
+        for i, record in enumerate(records)
+    ]
+
+    # the connection context manager commits, or rolls back on error
+    connection = _connect(competition, tournament)
+    with connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO records "
+            "(kind, id, player_A, player_B, challenge, updated, body) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+##############################################
+def delete_sqlite_record(competition, tournament, kind, record_id):
+    """Delete a record"""
+
+    connection = _connect(competition, tournament)
+    with connection:
+        connection.execute(
+            "DELETE FROM records WHERE kind = ? AND id = ?", (kind, record_id)
+        )